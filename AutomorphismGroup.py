@@ -0,0 +1,203 @@
+from CanonicalForm import CanonicalForm
+
+
+class AutomorphismGroup(CanonicalForm):
+    """
+    A Class to compute the automorphism group of a (small) graph by individualization-refinement, without listing
+    its elements: orbits of point stabilizers are found by searching for one automorphism per pair of vertices that
+    color refinement cannot tell apart, and every automorphism found is kept as a generator.
+
+    Attributes
+    ----------
+    generators:List[Dict[int, int]] - the automorphisms found, as vertex -> image maps
+
+    Methods
+    -------
+    findAutomorphism: an automorphism fixing a set of vertices and mapping one vertex onto another
+
+    getOrbits: orbits of the stabilizer of a set of vertices
+
+    getConditions: Grochow-Kellis symmetry-breaking conditions from the stabilizer chain
+
+    getOrder: number of automorphisms
+    """
+
+    def __init__(self, graph, directed=None):
+        """
+        Constructor
+        :param graph:Graph - the graph (vertex IDs must be integers)
+        :param directed:boolean - only count automorphisms that preserve edge directions,
+            defaults to graph.getDirected()
+        """
+        self.loadGraph(graph, directed)
+        self.index = {vertex: i for i, vertex in enumerate(self.vertices)}
+        self.adjacency = set(self.arcs) if self.directed else set(self.arcs) | {(v, u) for u, v in self.arcs}
+        self.permutations = []
+        self.chain = None
+
+    @property
+    def generators(self):
+        return [{self.vertices[i]: self.vertices[image] for i, image in enumerate(permutation)}
+                for permutation in self.permutations]
+
+    def refinePair(self, first, second):
+        """
+        Refine two colorings of the graph side by side, colors are ranked over the signatures of both so that a color
+        means the same in both
+        :param first:List[int] - a coloring
+        :param second:List[int] - another coloring
+        :return: (List[int], List[int]) - both stable colorings, None if their color classes can't match
+        """
+        numberOfColors = -1
+        while True:
+            firstSignatures = self.signatures(first)
+            secondSignatures = self.signatures(second)
+            if sorted(firstSignatures) != sorted(secondSignatures):
+                return None
+            rank = {signature: i for i, signature in enumerate(sorted(set(firstSignatures)))}
+            first = [rank[signature] for signature in firstSignatures]
+            second = [rank[signature] for signature in secondSignatures]
+            if len(rank) == numberOfColors:
+                return first, second
+            numberOfColors = len(rank)
+
+    def matchColorings(self, first, second):
+        """
+        Search for an automorphism that maps every vertex colored c in first onto a vertex colored c in second
+        :param first:List[int] - a stable coloring
+        :param second:List[int] - a stable coloring with the same color classes
+        :return: List[int] - the automorphism as vertex index -> image index, None if there is none
+        """
+        if max(first, default=-1) + 1 == len(first):
+            position = {color: vertex for vertex, color in enumerate(second)}
+            permutation = [position[color] for color in first]
+            if all((permutation[u], permutation[v]) in self.adjacency for u, v in self.arcs):
+                return permutation
+            return None
+        sizes = {}
+        for color in first:
+            sizes[color] = sizes.get(color, 0) + 1
+        color = min(color for color, size in sizes.items() if size > 1)
+        vertex = first.index(color)
+        individualized = self.individualize(first, vertex)
+        for candidate in range(len(second)):
+            if second[candidate] != color:
+                continue
+            refined = self.refinePair(individualized, self.individualize(second, candidate))
+            if refined is not None:
+                permutation = self.matchColorings(*refined)
+                if permutation is not None:
+                    return permutation
+        return None
+
+    def findAutomorphism(self, fixed, source, target):
+        """
+        :param fixed:List[int] - vertices the automorphism must fix
+        :param source:int - a vertex
+        :param target:int - the image source must have
+        :return: Dict[int, int] - the automorphism as vertex -> image, None if there is none
+        """
+        permutation = self.findPermutation([self.index[vertex] for vertex in fixed], self.index[source],
+                                           self.index[target])
+        if permutation is None:
+            return None
+        return {self.vertices[i]: self.vertices[image] for i, image in enumerate(permutation)}
+
+    def findPermutation(self, fixed, source, target):
+        """
+        findAutomorphism on vertex indices
+        """
+        first = [0] * len(self.vertices)
+        second = [0] * len(self.vertices)
+        for vertex in fixed:
+            first = self.individualize(first, vertex)
+            second = self.individualize(second, vertex)
+        first = self.individualize(first, source)
+        second = self.individualize(second, target)
+        refined = self.refinePair(first, second)
+        if refined is None:
+            return None
+        return self.matchColorings(*refined)
+
+    def getOrbits(self, fixed=()):
+        """
+        :param fixed:List[int] - vertices to fix
+        :return: List[List[int]] - the orbits of the stabilizer of fixed, each sorted, ordered by smallest vertex
+        """
+        fixedIndices = [self.index[vertex] for vertex in fixed]
+        representative = list(range(len(self.vertices)))
+
+        def find(vertex):
+            while representative[vertex] != vertex:
+                representative[vertex] = representative[representative[vertex]]
+                vertex = representative[vertex]
+            return vertex
+
+        def merge(permutation):
+            for vertex, image in enumerate(permutation):
+                first, second = find(vertex), find(image)
+                if first != second:
+                    representative[max(first, second)] = min(first, second)
+
+        "generators found earlier that fix the same vertices already merge their orbits"
+        for permutation in self.permutations:
+            if all(permutation[vertex] == vertex for vertex in fixedIndices):
+                merge(permutation)
+
+        colors = [0] * len(self.vertices)
+        for vertex in fixedIndices:
+            colors = self.individualize(colors, vertex)
+        colors = self.refine(colors)
+        for source in range(len(self.vertices)):
+            if find(source) != source:
+                continue
+            for target in range(source + 1, len(self.vertices)):
+                if colors[target] != colors[source] or find(target) == source:
+                    continue
+                permutation = self.findPermutation(fixedIndices, source, target)
+                if permutation is not None:
+                    self.permutations.append(permutation)
+                    merge(permutation)
+
+        orbits = {}
+        for vertex in range(len(self.vertices)):
+            orbits.setdefault(find(vertex), []).append(self.vertices[vertex])
+        return sorted(orbits.values())
+
+    def getStabilizerChain(self):
+        """
+        Fix, one after the other, the smallest vertex of the largest orbit of the stabilizer of the vertices fixed
+        so far, until the stabilizer is trivial
+        :return: List[(int, List[int])] - every fixed vertex with its orbit
+        """
+        if self.chain is None:
+            self.chain = []
+            fixed = []
+            while True:
+                orbits = [orbit for orbit in self.getOrbits(fixed) if len(orbit) > 1]
+                if not orbits:
+                    break
+                orbit = max(orbits, key=len)
+                self.chain.append((orbit[0], orbit))
+                fixed.append(orbit[0])
+        return self.chain
+
+    def getConditions(self):
+        """
+        Grochow-Kellis symmetry-breaking conditions: for every fixed vertex of the stabilizer chain, its image must be
+        smaller than the images of the other vertices of its orbit
+        :return: Dict[int, List[List[int]]] - the conditions in the format of Utility.findCondition
+        """
+        conditions = {}
+        for vertex, orbit in self.getStabilizerChain():
+            conditions.setdefault(vertex, []).append(orbit)
+        return conditions
+
+    def getOrder(self):
+        """
+        :return: int - the number of automorphisms (product of the orbit sizes along the stabilizer chain)
+        """
+        order = 1
+        for vertex, orbit in self.getStabilizerChain():
+            order *= len(orbit)
+        return order
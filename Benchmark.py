@@ -0,0 +1,210 @@
+from ConditionCache import ConditionCache
+from Graph import Graph
+from GraphProcessor import GraphProcessor
+from RandomGraphGenerator import RandomGraphGenerator
+from Utility import Utility
+from tempfile import TemporaryDirectory
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+
+class Benchmark:
+    """
+    A Class to time the stages of a motif search on synthetic input graphs of increasing size and to check the counts
+    against reference values, so that speedups and regressions can be compared across versions.
+    Every input graph is generated from a seed derived from the model and the size, so the counts are reproducible.
+
+    Methods
+    -------
+    run: time all the models and sizes
+
+    runCase: time one model at one size
+
+    check: compare the counts of a run with the reference counts
+    """
+
+    motifs = {
+        "wedge": [[0, 1], [1, 2]],
+        "triangle": [[0, 1], [1, 2], [2, 0]],
+        "path4": [[0, 1], [1, 2], [2, 3]],
+        "star4": [[0, 1], [0, 2], [0, 3]],
+        "cycle4": [[0, 1], [1, 2], [2, 3], [3, 0]],
+        "paw": [[0, 1], [1, 2], [2, 0], [2, 3]],
+    }
+    models = ("erdosRenyi", "powerLaw")
+
+    def __init__(self, sizes=(500, 1000, 2000, 4000), models=None, averageDegree=3, directed=False, seed=1,
+                 engine="iterative"):
+        """
+        Constructor
+        :param sizes:List[int] - numbers of vertices of the input graphs
+        :param models:List[str] - "erdosRenyi" and/or "powerLaw", defaults to both
+        :param averageDegree:float - average degree of the input graphs
+        :param directed:boolean - generate directed input and query graphs
+        :param seed:int - seed the input graphs are derived from
+        :param engine:str - search engine of algorithm2_modified
+        """
+        self.sizes = list(sizes)
+        self.models = list(self.models if models is None else models)
+        self.averageDegree = averageDegree
+        self.directed = directed
+        self.seed = seed
+        self.engine = engine
+
+    def getKey(self, model, size):
+        """
+        :return: str - the name of a case in the results and in the reference file
+        """
+        return "%s-%s-n%d-degree%g-seed%d" % (model, "directed" if self.directed else "undirected", size,
+                                              self.averageDegree, self.seed)
+
+    def run(self, log=None):
+        """
+        run: time every model at every size
+        :param log:Callable[[str], None] - called with a line of text after every case
+        :return: Dict[str, object] - the settings, the environment and one result per case (see runCase)
+        """
+        results = {
+            "settings": {"sizes": self.sizes, "models": self.models, "averageDegree": self.averageDegree,
+                         "directed": self.directed, "seed": self.seed, "engine": self.engine},
+            "environment": {"python": sys.version.split()[0], "implementation": platform.python_implementation(),
+                            "machine": platform.machine(), "system": platform.system()},
+            "cases": {},
+        }
+        with TemporaryDirectory() as directory:
+            for model in self.models:
+                for size in self.sizes:
+                    case = self.runCase(model, size, directory)
+                    results["cases"][self.getKey(model, size)] = case
+                    if log is not None:
+                        log("%-44s %s" % (self.getKey(model, size), " ".join(
+                            "%s=%.3fs" % (stage, seconds) for stage, seconds in case["seconds"].items())))
+        return results
+
+    def runCase(self, model, size, directory):
+        """
+        runCase: time one synthetic input graph: generating it, loading it from an edge list (parsing, then from the
+            binary cache), generating one random graph with its degree sequence, computing the symmetry-breaking
+            conditions and plans of the motifs, and counting every motif
+        :param model:str - "erdosRenyi" or "powerLaw"
+        :param size:int - number of vertices
+        :param directory:str - where the edge list is written
+        :return: Dict[str, object] - numbers of vertices and edges, seconds per stage and the count of every motif
+        """
+        seconds = {}
+        generator = RandomGraphGenerator("%s-%s-%d" % (self.seed, model, size))
+        numberOfEdges = int(size * self.averageDegree / 2)
+        start = time.perf_counter()
+        if model == "erdosRenyi":
+            graph = generator.generateErdosRenyi(size, numberOfEdges, self.directed)
+        elif model == "powerLaw":
+            graph = generator.generatePowerLaw(size, numberOfEdges, directed=self.directed)
+        else:
+            raise ValueError("unknown model: %s" % model)
+        seconds["generate"] = time.perf_counter() - start
+
+        fileName = os.path.join(directory, "%s-%d.txt" % (model, size))
+        with open(fileName, "w") as edgeFile:
+            edgeFile.writelines("%s %s\n" % (graph.mappings[source], graph.mappings[target])
+                                for source, target in graph.getEdgeList())
+        processor = GraphProcessor()
+        start = time.perf_counter()
+        inputGraph = processor.loadGraph(fileName, self.directed, cache=False)
+        seconds["load"] = time.perf_counter() - start
+        processor.readEdges(fileName)
+        start = time.perf_counter()
+        processor.loadGraph(fileName, self.directed)
+        seconds["loadCached"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        generator.generateConfigurationModel(inputGraph)
+        seconds["randomGraph"] = time.perf_counter() - start
+
+        queryGraphs = {name: Graph(edges, directed=self.directed) for name, edges in self.motifs.items()}
+        roots = {name: queryGraph.getNodesSortedByDegree(0)[-1] for name, queryGraph in queryGraphs.items()}
+        "a fresh cache, so the conditions are computed rather than looked up"
+        savedCache = Utility.conditionCache
+        Utility.conditionCache = ConditionCache()
+        try:
+            utility = Utility()
+            start = time.perf_counter()
+            for name, queryGraph in queryGraphs.items():
+                condition = utility.getConditions(queryGraph, roots[name], self.directed)
+                utility.createQueryPlan(queryGraph, roots[name], condition, self.directed)
+            seconds["conditions"] = time.perf_counter() - start
+
+            counts = {}
+            for name, queryGraph in queryGraphs.items():
+                start = time.perf_counter()
+                counts[name] = utility.algorithm2_modified(queryGraph, inputGraph, roots[name], 0,
+                                                           engine=self.engine, mode="count")
+                seconds["count." + name] = time.perf_counter() - start
+        finally:
+            Utility.conditionCache = savedCache
+
+        return {"vertices": inputGraph.getNumberofVertices(), "edges": inputGraph.getNumberofEdges(),
+                "seconds": seconds, "counts": counts}
+
+    @staticmethod
+    def check(results, reference):
+        """
+        check: compare the counts of a run with reference counts
+        :param results:Dict[str, object] - the result of run
+        :param reference:Dict[str, Dict[str, int]] - the expected count of every motif, per case
+        :return: List[str] - a description of every count that differs (cases without reference are skipped)
+        """
+        mismatches = []
+        for key, case in results["cases"].items():
+            expected = reference.get(key)
+            if expected is None:
+                continue
+            for name, count in case["counts"].items():
+                if name in expected and expected[name] != count:
+                    mismatches.append("%s %s: expected %d, got %d" % (key, name, expected[name], count))
+        return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time NemoMap on synthetic input graphs of increasing size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000, 4000])
+    parser.add_argument("--models", nargs="+", choices=Benchmark.models, default=list(Benchmark.models))
+    parser.add_argument("--average-degree", type=float, default=3)
+    parser.add_argument("--directed", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--engine", choices=["recursive", "iterative"], default="iterative")
+    parser.add_argument("--reference", default="benchmarkReference.json",
+                        help="JSON file with the expected counts of every case")
+    parser.add_argument("--update-reference", action="store_true",
+                        help="store the counts of this run in the reference file instead of checking them")
+    parser.add_argument("--output", default="static/benchmark.json", help="JSON file the results are written to")
+    arguments = parser.parse_args()
+
+    benchmark = Benchmark(arguments.sizes, arguments.models, arguments.average_degree, arguments.directed,
+                          arguments.seed, arguments.engine)
+    results = benchmark.run(print)
+
+    reference = {}
+    if os.path.exists(arguments.reference):
+        with open(arguments.reference) as referenceFile:
+            reference = json.load(referenceFile)
+    if arguments.update_reference:
+        reference.update({key: case["counts"] for key, case in results["cases"].items()})
+        with open(arguments.reference, "w") as referenceFile:
+            json.dump(reference, referenceFile, indent=2, sort_keys=True)
+            referenceFile.write("\n")
+        mismatches = []
+    else:
+        mismatches = Benchmark.check(results, reference)
+    results["mismatches"] = mismatches
+
+    if os.path.dirname(arguments.output):
+        os.makedirs(os.path.dirname(arguments.output), exist_ok=True)
+    with open(arguments.output, "w") as outputFile:
+        json.dump(results, outputFile, indent=2)
+    for mismatch in mismatches:
+        print("MISMATCH " + mismatch)
+    sys.exit(1 if mismatches else 0)
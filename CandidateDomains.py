@@ -0,0 +1,145 @@
+from collections import deque
+
+
+class CandidateDomains:
+    """
+    A Class to compute, once per query graph and input graph, the input vertices every query vertex can be mapped to.
+    An occurrence maps the edges at a query vertex x to distinct edges at its image, so the image needs at least the
+    degree of x (and its in and out degrees when directions are matched), and its neighbor degrees, largest first,
+    must be at least those of x. The domains are then refined until they stop changing: an input vertex stays in the
+    domain of x only if, for every neighbor y of x, it has a neighbor (through an edge of the same direction) in the
+    domain of y, and it has at least as many neighbors in the domains of the neighbors of x as x has neighbors.
+
+    Attributes
+    ----------
+    domains:Dict[int, Set[int]] - the candidate input vertices of every query vertex
+    iterations:int - number of times a domain was checked before the fixpoint
+
+    Methods
+    -------
+    filterByDegree: the initial domains, from the degrees and neighbor degree profiles
+
+    refine: remove the vertices without support until the domains stop changing
+
+    getPlanDomains: the domains in the matching order of a plan
+    """
+
+    def __init__(self, queryGraph, inputGraph, directed=False):
+        """
+        Constructor: compute the domains
+        :param queryGraph:Graph - the query graph
+        :param inputGraph:Graph or CompactGraph - the input graph
+        :param directed:boolean - match edge directions (both graphs must be directed)
+        """
+        self.queryGraph = queryGraph
+        self.inputGraph = inputGraph
+        self.directed = directed
+        queryVertexList = queryGraph.getVertexList()
+        "undirected matching ignores the direction, an edge in both directions is one neighbor"
+        self.queryNeighbors = {x: list(queryVertexList[x]) if directed else sorted(set(queryVertexList[x]))
+                               for x in queryVertexList}
+        self.domains = {}
+        self.iterations = 0
+        self.filterByDegree()
+        self.refine()
+
+    def filterByDegree(self):
+        """
+        filterByDegree: keep, for every query vertex, the input vertices with at least its degree (in and out degree
+            when directed) whose neighbor degrees, sorted in descending order, are at least its own one by one
+        """
+        queryNeighbors = self.queryNeighbors
+        vertexList = self.inputGraph.getVertexList()
+        degree = {v: len(vertexList[v]) for v in vertexList}
+        profiles = {}
+        if self.directed:
+            queryFrom, queryTo = self.queryGraph.getFrom(), self.queryGraph.getTo()
+            inputFrom, inputTo = self.inputGraph.getFrom(), self.inputGraph.getTo()
+
+        for x, neighbors in queryNeighbors.items():
+            profile = sorted((len(queryNeighbors[y]) for y in neighbors), reverse=True)
+            size = len(profile)
+            if self.directed:
+                outDegree = len(queryFrom.get(x, ()))
+                inDegree = len(queryTo.get(x, ()))
+            domain = set()
+            for v, vertexDegree in degree.items():
+                if vertexDegree < size:
+                    continue
+                if self.directed and (len(inputFrom.get(v, ())) < outDegree or len(inputTo.get(v, ())) < inDegree):
+                    continue
+                vertexProfile = profiles.get(v)
+                if vertexProfile is None:
+                    vertexProfile = sorted((degree[w] for w in vertexList[v]), reverse=True)
+                    profiles[v] = vertexProfile
+                if all(vertexProfile[i] >= profile[i] for i in range(size)):
+                    domain.add(v)
+            self.domains[x] = domain
+
+    def refine(self):
+        """
+        refine: remove the input vertices that lack a neighbor in the domain of a neighbor of their query vertex, or
+            enough distinct neighbors in all of them, until no domain changes (a query vertex is checked again
+            whenever the domain of one of its neighbors shrinks)
+        """
+        queryNeighbors = self.queryNeighbors
+        domains = self.domains
+        pending = deque(queryNeighbors)
+        queued = set(queryNeighbors)
+        while pending:
+            x = pending.popleft()
+            queued.discard(x)
+            self.iterations += 1
+            domain = domains[x]
+            supported = {v for v in domain if self.isSupported(x, v)}
+            if len(supported) == len(domain):
+                continue
+            domains[x] = supported
+            for y in queryNeighbors[x]:
+                if y not in queued:
+                    queued.add(y)
+                    pending.append(y)
+
+    def isSupported(self, x, v):
+        """
+        :param x:int - a query vertex
+        :param v:int - an input vertex of its domain
+        :return: boolean - true if every neighbor of x has a candidate among the neighbors of v, and v has at least as
+            many distinct neighbors in the domains of the neighbors of x as x has neighbors
+        """
+        domains = self.domains
+        neighbors = set(self.queryNeighbors[x])
+        inputNeighbors = self.inputGraph.getVertexList()[v]
+        if self.directed:
+            outMask = self.queryGraph.getOutMask(x)
+            inMask = self.queryGraph.getInMask(x)
+            outNeighbors = self.inputGraph.getFrom().get(v, ())
+            inNeighbors = self.inputGraph.getTo().get(v, ())
+        for y in neighbors:
+            domain = domains[y]
+            if not self.directed:
+                found = any(w in domain for w in inputNeighbors)
+            else:
+                found = (not outMask >> y & 1 or any(w in domain for w in outNeighbors)) and \
+                        (not inMask >> y & 1 or any(w in domain for w in inNeighbors))
+            if not found:
+                return False
+        "stop counting the neighbors in the domains as soon as there are enough"
+        needed = len(neighbors)
+        reachable = set()
+        for w in inputNeighbors:
+            if w not in reachable and any(w in domains[y] for y in neighbors):
+                reachable.add(w)
+                if len(reachable) >= needed:
+                    return True
+        return False
+
+    def getPlanDomains(self, plan):
+        """
+        getPlanDomains: the domains in the matching order of a plan, for the searches to prune candidates with
+        :param plan:QueryPlan - the matching plan
+        :return: List[Set[int]] - the domain of every query vertex of plan.order, None for a domain that holds every
+            input vertex (nothing to prune)
+        """
+        numberOfVertices = self.inputGraph.getNumberofVertices()
+        return [None if len(self.domains[x]) == numberOfVertices else self.domains[x] for x in plan.order]
@@ -0,0 +1,164 @@
+from hashlib import sha1
+
+
+class CanonicalForm:
+    """
+    A Class to compute the canonical labelling of a (small) graph by color refinement and individualization-refinement.
+    Two graphs get the same certificate if and only if they are isomorphic (with edge directions when directed is set),
+    and the canonical labelling maps both onto the same canonical graph.
+
+    Attributes
+    ----------
+    vertices:List[int] - the vertices of the graph, in ascending order
+    labelling:Dict[int, int] - canonical index of every vertex
+    certificate:tuple - number of vertices, directedness and the edges of the canonical graph
+    key:str - hex digest of the certificate, usable as a file name
+
+    Methods
+    -------
+    refine: color refinement of a vertex coloring until it is stable
+
+    toCanonical / fromCanonical: translate vertex lists between the graph and the canonical graph
+    """
+
+    def __init__(self, graph, directed=None):
+        """
+        Constructor: compute the canonical labelling
+        :param graph:Graph - the graph (vertex IDs must be integers)
+        :param directed:boolean - take edge directions into account, defaults to graph.getDirected()
+        """
+        self.loadGraph(graph, directed)
+        self.automorphisms = []
+        self.bestCertificate = None
+        self.bestPermutation = None
+
+        self.search(self.refine([0] * len(self.vertices)), [])
+        self.labelling = {vertex: self.bestPermutation[i] for i, vertex in enumerate(self.vertices)}
+        self.certificate = (len(self.vertices), self.directed, self.bestCertificate)
+        self.key = sha1(repr(self.certificate).encode()).hexdigest()
+
+    def loadGraph(self, graph, directed):
+        """
+        Index the vertices of the graph 0..n-1 and keep their (out, in) neighbors by index
+        :param graph:Graph - the graph
+        :param directed:boolean - take edge directions into account, None for graph.getDirected()
+        """
+        self.directed = graph.getDirected() if directed is None else directed
+        self.vertices = sorted(graph.getVertexList())
+        index = {vertex: i for i, vertex in enumerate(self.vertices)}
+        self.neighbors = [sorted({index[u] for u in graph.getNeighbors(v)}) for v in self.vertices]
+        if self.directed:
+            self.outNeighbors = [sorted({index[u] for u in graph.getFrom()[v]}) for v in self.vertices]
+            self.inNeighbors = [sorted({index[u] for u in graph.getTo()[v]}) for v in self.vertices]
+            self.arcs = [(u, v) for u in range(len(self.vertices)) for v in self.outNeighbors[u]]
+        else:
+            self.arcs = [(u, v) for u in range(len(self.vertices)) for v in self.neighbors[u] if u < v]
+
+    def refine(self, colors):
+        """
+        Color refinement: split every color class by the colors of the neighbors until no class splits any more.
+        Colors are ranks of sorted signatures, so the result does not depend on the vertex IDs.
+        :param colors:List[int] - color of every vertex (by index in self.vertices)
+        :return: List[int] - the stable coloring, colors are 0..k-1
+        """
+        numberOfColors = -1
+        while True:
+            signatures = self.signatures(colors)
+            rank = {signature: i for i, signature in enumerate(sorted(set(signatures)))}
+            colors = [rank[signature] for signature in signatures]
+            if len(rank) == numberOfColors:
+                return colors
+            numberOfColors = len(rank)
+
+    def signatures(self, colors):
+        """
+        :param colors:List[int] - color of every vertex
+        :return: List[tuple] - color of every vertex with the sorted colors of its (out and in) neighbors
+        """
+        if self.directed:
+            return [(colors[v], tuple(sorted(colors[u] for u in self.outNeighbors[v])),
+                     tuple(sorted(colors[u] for u in self.inNeighbors[v]))) for v in range(len(colors))]
+        return [(colors[v], tuple(sorted(colors[u] for u in self.neighbors[v]))) for v in range(len(colors))]
+
+    @staticmethod
+    def individualize(colors, vertex):
+        """
+        :param colors:List[int] - a coloring
+        :param vertex:int - index of the vertex to single out of its color class
+        :return: List[int] - coloring where vertex comes first in its former class
+        """
+        individualized = [2 * color + 1 for color in colors]
+        individualized[vertex] -= 1
+        return individualized
+
+    def orbitsFixing(self, prefix, cell):
+        """
+        :param prefix:List[int] - individualized vertices
+        :param cell:List[int] - a color class
+        :return: Dict[int, int] - representative of every vertex of cell under the automorphisms found so far that
+            fix every vertex of prefix
+        """
+        representative = {vertex: vertex for vertex in cell}
+
+        def find(vertex):
+            while representative[vertex] != vertex:
+                vertex = representative[vertex]
+            return vertex
+
+        for automorphism in self.automorphisms:
+            if all(automorphism[vertex] == vertex for vertex in prefix):
+                for vertex in cell:
+                    image = automorphism[vertex]
+                    if image in representative:
+                        first, second = find(vertex), find(image)
+                        if first != second:
+                            representative[max(first, second)] = min(first, second)
+        return {vertex: find(vertex) for vertex in cell}
+
+    def search(self, colors, prefix):
+        """
+        Individualization-refinement search for the smallest certificate, branches that are equivalent under an
+        automorphism found earlier are skipped
+        :param colors:List[int] - a stable coloring
+        :param prefix:List[int] - vertices individualized so far
+        """
+        numberOfColors = max(colors) + 1 if colors else 0
+        if numberOfColors == len(colors):
+            certificate = tuple(sorted((colors[u], colors[v]) if self.directed
+                                       else tuple(sorted((colors[u], colors[v]))) for u, v in self.arcs))
+            if self.bestCertificate is None or certificate < self.bestCertificate:
+                self.bestCertificate = certificate
+                self.bestPermutation = colors
+            elif certificate == self.bestCertificate:
+                "both leaves give the same graph: best^-1 . colors is an automorphism"
+                inverse = {position: vertex for vertex, position in enumerate(self.bestPermutation)}
+                self.automorphisms.append([inverse[colors[vertex]] for vertex in range(len(colors))])
+            return
+
+        cells = {}
+        for vertex, color in enumerate(colors):
+            cells.setdefault(color, []).append(vertex)
+        cell = next(cells[color] for color in range(numberOfColors) if len(cells[color]) > 1)
+        explored = []
+        for vertex in cell:
+            orbits = self.orbitsFixing(prefix, cell)
+            if any(orbits[other] == orbits[vertex] for other in explored):
+                continue
+            explored.append(vertex)
+            self.search(self.refine(self.individualize(colors, vertex)), prefix + [vertex])
+
+    def toCanonical(self, vertices):
+        """
+        :param vertices:List[int] - vertices of the graph
+        :return: List[int] - the same vertices in canonical labels
+        """
+        return [self.labelling[vertex] for vertex in vertices]
+
+    def fromCanonical(self, labels):
+        """
+        :param labels:List[int] - vertices in canonical labels
+        :return: List[int] - the same vertices of the graph
+        """
+        if not hasattr(self, "inverse"):
+            self.inverse = {label: vertex for vertex, label in self.labelling.items()}
+        return [self.inverse[label] for label in labels]
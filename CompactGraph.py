@@ -0,0 +1,496 @@
+from Graph import Graph
+from LabelMapping import LabelMapping
+from array import array
+from bisect import bisect_left
+import mmap
+import os
+import struct
+import sys
+
+
+class _AdjacencyView:
+    """
+    A read-only dict-like view of one CSR adjacency (offsets + neighbors) so that code written
+    against Graph.vertexList / Graph.fromNode / Graph.toNode can run on a CompactGraph unchanged
+    """
+
+    def __init__(self, vertexOrder, offsets, neighbors):
+        self.vertexOrder = vertexOrder
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.size = None
+
+    def __getitem__(self, vertex):
+        if 0 <= vertex < len(self.offsets) - 1:
+            return self.neighbors[self.offsets[vertex]:self.offsets[vertex + 1]]
+        return self.neighbors[0:0]
+
+    def get(self, vertex, default=None):
+        if vertex in self:
+            return self[vertex]
+        return default
+
+    def __contains__(self, vertex):
+        return 0 <= vertex < len(self.offsets) - 1 and self.offsets[vertex] != self.offsets[vertex + 1]
+
+    def __iter__(self):
+        for vertex in self.vertexOrder:
+            if self.offsets[vertex] != self.offsets[vertex + 1]:
+                yield vertex
+
+    def __len__(self):
+        if self.size is None:
+            self.size = sum(1 for _ in self)
+        return self.size
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [self[vertex] for vertex in self]
+
+    def items(self):
+        return [(vertex, self[vertex]) for vertex in self]
+
+
+class _LabelTable:
+    """
+    The labels of a memory-mapped CompactGraph, decoded one at a time from the file: table[id] is the label of a vertex
+    (as with LabelMapping), label -> ID lookups build the reverse dict on first use
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+        self.mapping = None
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return bytes(self.data[self.offsets[key]:self.offsets[key + 1]]).decode()
+        return self.getMapping()[key]
+
+    def __contains__(self, key):
+        if isinstance(key, int):
+            return 0 <= key < len(self)
+        return key in self.getMapping()
+
+    def __len__(self):
+        return max(len(self.offsets) - 1, 0)
+
+    def __iter__(self):
+        for vertex in range(len(self)):
+            yield self[vertex]
+
+    def getMapping(self):
+        """
+        :return: LabelMapping - all the labels, loaded into memory
+        """
+        if self.mapping is None:
+            self.mapping = LabelMapping(list(self))
+        return self.mapping
+
+    def __reduce__(self):
+        return LabelMapping, (list(self),)
+
+
+class CompactGraph:
+    """
+    A Class to represent a network as a frozen CSR (compressed sparse row) structure.
+    Vertex IDs must be non-negative integers (as produced by GraphProcessor), the neighbors
+    of vertex v are neighbors[offsets[v]:offsets[v + 1]] in ascending order.
+
+    Attributes
+    ----------
+    offsets, neighbors:array - undirected adjacency (same multiset as Graph.vertexList)
+    outOffsets, outNeighbors:array - out adjacency (directed graphs only, same as Graph.fromNode)
+    inOffsets, inNeighbors:array - in adjacency (directed graphs only, same as Graph.toNode)
+    vertexOrder:array - vertices in first-seen order (same iteration order as Graph.vertexList)
+    edgeSources, edgeTargets:array - the edges, in insertion order
+
+    Methods
+    -------
+    fromGraph: build a CompactGraph from a Graph
+
+    fromEdgeList: build a CompactGraph directly from a list of edges
+
+    fromArrays: build a CompactGraph from the edge arrays of GraphProcessor.readEdges, without a list of edges
+
+    save: write the CSR arrays and the labels to a file
+
+    open: memory-map a file written by save, nothing is deserialised and processes that open the same file share its
+        page-cached copy
+
+    getNeighborRange: offsets of the neighbors of a vertex in the neighbors array
+
+    getDegree: number of neighbors of a vertex
+
+    getNeighborMask, getOutMask, getInMask: bitset of the (out, in) neighbors of a vertex
+
+    All read-only methods of Graph are provided with the same return values, so Utility can
+    search a CompactGraph unchanged
+    """
+
+    def __init__(self, vertexOrder, offsets, neighbors, edgeSources, edgeTargets, mappings=None, directed=False,
+                 outOffsets=None, outNeighbors=None, inOffsets=None, inNeighbors=None):
+        """
+        Constructor: wrap already built CSR arrays, use fromGraph or fromEdgeList to build them
+        """
+        if mappings is None:
+            mappings = []
+        self.fileName = None
+        self.vertexOrder = vertexOrder
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.edgeSources = edgeSources
+        self.edgeTargets = edgeTargets
+        self.mappings = mappings
+        self.directed = directed
+        self.outOffsets = outOffsets
+        self.outNeighbors = outNeighbors
+        self.inOffsets = inOffsets
+        self.inNeighbors = inNeighbors
+        self.neighborMasks = {}
+        self.outMasks = {}
+        self.inMasks = {}
+        self.vertexList = _AdjacencyView(vertexOrder, offsets, neighbors)
+        if directed:
+            self.fromNode = _AdjacencyView(vertexOrder, outOffsets, outNeighbors)
+            self.toNode = _AdjacencyView(vertexOrder, inOffsets, inNeighbors)
+        else:
+            empty = array("q", bytes(len(offsets) * 8))
+            self.fromNode = _AdjacencyView(vertexOrder, empty, neighbors[0:0])
+            self.toNode = self.fromNode
+
+    @classmethod
+    def fromGraph(cls, graph):
+        """
+        fromGraph: build a CompactGraph from a Graph
+        :param graph:Graph - the graph to freeze
+        :return: CompactGraph - a CSR copy of graph
+        """
+        return cls.fromEdgeList(graph.getEdgeList(), graph.mappings, graph.getDirected(), list(graph.getVertexList()))
+
+    @classmethod
+    def fromEdgeList(cls, inputEdgeList, mappings=None, directed=False, vertexOrder=None):
+        """
+        fromEdgeList: build a CompactGraph from a list of edges
+        :param inputEdgeList:List[List[int]] - the edges of the graph
+        :param mappings: the label mappings of the graph (see GraphProcessor)
+        :param directed:boolean - whether the graph is directed
+        :param vertexOrder:List[int] - iteration order of the vertices, defaults to first-seen order
+        :return: CompactGraph - the CSR graph
+        """
+        sources = [edge[0] for edge in inputEdgeList]
+        targets = [edge[1] for edge in inputEdgeList]
+        if vertexOrder is None:
+            vertexOrder = dict.fromkeys(vertex for edge in inputEdgeList for vertex in edge)
+        vertexOrder = list(vertexOrder)
+        size = max(vertexOrder) + 1 if vertexOrder else 0
+        vertexType = "i" if size < 2 ** 31 else "q"
+        return cls.buildGraph(array(vertexType, sources), array(vertexType, targets), array(vertexType, vertexOrder),
+                              size, mappings, directed)
+
+    @classmethod
+    def fromArrays(cls, sources, targets, mappings=None, directed=False):
+        """
+        fromArrays: build a CompactGraph from edge arrays, skipping self-loops and repeated edges (in either direction
+            when undirected) as Graph does. Only the kept edges are copied, into arrays, so a large edge list is never
+            held as Python lists
+        :param sources, targets:array - source and target of every edge (see GraphProcessor.readEdges)
+        :param mappings: the label mappings of the graph (see GraphProcessor)
+        :param directed:boolean - whether the graph is directed
+        :return: CompactGraph - the CSR graph, with the vertices in first-seen order
+        """
+        size = max(max(sources, default=-1), max(targets, default=-1)) + 1
+        vertexType = "i" if size < 2 ** 31 else "q"
+        keptSources = array(vertexType)
+        keptTargets = array(vertexType)
+        seen = set()
+        for source, target in zip(sources, targets):
+            if source == target:
+                continue
+            key = source * size + target if directed or source < target else target * size + source
+            if key not in seen:
+                seen.add(key)
+                keptSources.append(source)
+                keptTargets.append(target)
+        del seen
+        vertexOrder = array(vertexType, dict.fromkeys(vertex for edge in zip(keptSources, keptTargets)
+                                                      for vertex in edge))
+        size = max(vertexOrder) + 1 if vertexOrder else 0
+        return cls.buildGraph(keptSources, keptTargets, vertexOrder, size, mappings, directed)
+
+    @classmethod
+    def buildGraph(cls, sources, targets, vertexOrder, size, mappings, directed):
+        """
+        buildGraph: build the CSR arrays of distinct edges
+        :param sources, targets:array - source and target of every edge
+        :param vertexOrder:array - iteration order of the vertices
+        :param size:int - number of vertex slots (largest vertex ID + 1)
+        :param mappings: the label mappings of the graph (see GraphProcessor)
+        :param directed:boolean - whether the graph is directed
+        :return: CompactGraph - the CSR graph
+        """
+        vertexType = vertexOrder.typecode
+        offsets, neighbors = cls.buildAdjacency(sources + targets, targets + sources, size, vertexType)
+        outOffsets = outNeighbors = inOffsets = inNeighbors = None
+        if directed:
+            outOffsets, outNeighbors = cls.buildAdjacency(sources, targets, size, vertexType)
+            inOffsets, inNeighbors = cls.buildAdjacency(targets, sources, size, vertexType)
+
+        return cls(vertexOrder, offsets, neighbors, sources, targets, mappings, directed, outOffsets, outNeighbors,
+                   inOffsets, inNeighbors)
+
+    @staticmethod
+    def buildAdjacency(sources, targets, size, vertexType):
+        """
+        buildAdjacency: build sorted CSR arrays for the arcs sources[i] -> targets[i]
+        :param sources:List[int] - tail of every arc
+        :param targets:List[int] - head of every arc
+        :param size:int - number of vertex slots (largest vertex ID + 1)
+        :param vertexType:str - array typecode for vertex IDs
+        :return: (array, array) - offsets (length size + 1) and neighbors (length len(sources))
+        """
+        keys = sorted(source * size + target for source, target in zip(sources, targets))
+        neighbors = array(vertexType, [key % size for key in keys]) if size else array(vertexType)
+        offsets = array("q", [bisect_left(keys, vertex * size) for vertex in range(size)])
+        offsets.append(len(keys))
+        return offsets, neighbors
+
+    fileMagic = b"NEMOCSR1"
+    "magic, byte order, directed, then the typecode and length of every section"
+    fileHeader = struct.Struct("<8s8s?" + "cq" * 11)
+    fileSections = ("vertexOrder", "offsets", "neighbors", "edgeSources", "edgeTargets", "outOffsets", "outNeighbors",
+                    "inOffsets", "inNeighbors", "labelOffsets", "labels")
+
+    def save(self, fileName):
+        """
+        save: write the graph to fileName in the format read by open
+        :param fileName:string - the file to write
+        """
+        labels = [str(self.mappings[vertex]) for vertex in range(len(self.mappings))]
+        "the UTF-8 bytes of label i lie between labelOffsets[i] and labelOffsets[i + 1], so no separator is needed"
+        labelBytes = [label.encode() for label in labels]
+        labelOffsets = array("q", [0])
+        for label in labelBytes:
+            labelOffsets.append(labelOffsets[-1] + len(label))
+        arrays = {"labelOffsets": labelOffsets, "labels": array("B", b"".join(labelBytes))}
+        for name in self.fileSections[:-2]:
+            values = getattr(self, name)
+            arrays[name] = array("q") if values is None else array("q", values)
+
+        header = [self.fileMagic, sys.byteorder.encode(), self.directed]
+        for name in self.fileSections:
+            header += [arrays[name].typecode.encode(), len(arrays[name])]
+        temporaryName = "%s.%d.tmp" % (fileName, os.getpid())
+        with open(temporaryName, "wb") as graphFile:
+            graphFile.write(self.fileHeader.pack(*header))
+            for name in self.fileSections:
+                graphFile.write(bytes(-graphFile.tell() % 8))
+                arrays[name].tofile(graphFile)
+        os.replace(temporaryName, fileName)
+
+    @classmethod
+    def open(cls, fileName):
+        """
+        open: memory-map a graph written by save, the arrays of the CompactGraph are read-only views of the file
+        :param fileName:string - the file to open
+        :return: CompactGraph - the graph
+        """
+        with open(fileName, "rb") as graphFile:
+            fileMap = mmap.mmap(graphFile.fileno(), 0, access=mmap.ACCESS_READ)
+        header = cls.fileHeader.unpack_from(fileMap)
+        if header[0] != cls.fileMagic:
+            raise ValueError("%s is not a CompactGraph file" % fileName)
+        if header[1].rstrip(b"\0").decode() != sys.byteorder:
+            raise ValueError("%s was written on a machine with a different byte order" % fileName)
+        view = memoryview(fileMap)
+        position = cls.fileHeader.size
+        arrays = {}
+        for i, name in enumerate(cls.fileSections):
+            typecode, length = header[3 + 2 * i].decode(), header[4 + 2 * i]
+            position += -position % 8
+            size = length * struct.calcsize(typecode)
+            arrays[name] = view[position:position + size].cast(typecode)
+            position += size
+
+        directed = header[2]
+        graph = cls(arrays["vertexOrder"], arrays["offsets"], arrays["neighbors"], arrays["edgeSources"],
+                    arrays["edgeTargets"], _LabelTable(arrays["labelOffsets"], arrays["labels"]), directed,
+                    *((arrays[name] for name in cls.fileSections[5:9]) if directed else ()))
+        graph.fileName = fileName
+        graph.fileMap = fileMap
+        return graph
+
+    def __reduce_ex__(self, protocol):
+        "a memory-mapped graph is sent to other processes as its file name, so they map the same pages"
+        if self.fileName is not None:
+            return CompactGraph.open, (self.fileName,)
+        return object.__reduce_ex__(self, protocol)
+
+    def getNeighborRange(self, source):
+        """
+        :param source:int - the vertex
+        :return: (int, int) - start and end of the neighbors of source in self.neighbors
+        """
+        if 0 <= source < len(self.offsets) - 1:
+            return self.offsets[source], self.offsets[source + 1]
+        return 0, 0
+
+    def getDegree(self, source):
+        """
+        :param source:int - the vertex
+        :return: int - number of (undirected) neighbors of source, 0 if it doesn't exist
+        """
+        start, end = self.getNeighborRange(source)
+        return end - start
+
+    def getNumberofVertices(self):
+        """
+        :return: the number of vertices in graph
+        """
+        return len(self.vertexList)
+
+    def getNumberofEdges(self):
+        """
+        :return: the number of edges in graph
+        """
+        return len(self.edgeSources)
+
+    def getNodesSortedByDegree(self, degreeCutOff):
+        """
+        GetNodesSortedByDegree: get a list of vertices sorted by their degree sequence
+        :param degreeCutOff:int - the threshold of out degree that we want to check
+        :return: List[int]: list of nodes IDs sorted by out degree in ascending order
+        """
+        degree = self.getDegree
+        nodeSortedByDegree = [vertex for vertex in self.vertexList if degree(vertex) >= degreeCutOff]
+        nodeSortedByDegree.sort(key=degree)
+        return nodeSortedByDegree
+
+    def tryGetEdge(self, edge):
+        """
+        tryGetEdge: check if an edge exist in the graph (in either direction)
+        :param edge:List[int] - the edge we are trying to find
+        :return: boolean - true if edge exist, false otherwise
+        """
+        start, end = self.getNeighborRange(edge[0])
+        position = bisect_left(self.neighbors, edge[1], start, end)
+        return position != end and self.neighbors[position] == edge[1]
+
+    def hasArc(self, source, target):
+        """
+        hasArc: check if the directed edge source -> target exists (for undirected graphs, the edge in either direction)
+        :param source:int - tail of the edge
+        :param target:int - head of the edge
+        :return: boolean - true if the edge exists, false otherwise
+        """
+        if not self.directed:
+            return self.tryGetEdge([source, target])
+        if not 0 <= source < len(self.outOffsets) - 1:
+            return False
+        end = self.outOffsets[source + 1]
+        position = bisect_left(self.outNeighbors, target, self.outOffsets[source], end)
+        return position != end and self.outNeighbors[position] == target
+
+    def getNeighbors(self, source):
+        """
+        getNeighbors: return the neighbors of the source
+        :param source:int - the vertex we are finding the neighbors of
+        :return: array[int] - sorted neighbors of source
+        """
+        return self.vertexList[source]
+
+    def getDegreeSequence(self):
+        """
+        get degree sequence of all vertices in descending order
+        :return: List[int] - degree sequence of all vertices in descending order
+        """
+        return sorted((self.getDegree(vertex) for vertex in self.vertexList), reverse=True)
+
+    def getEdgeList(self):
+        """
+        :return: List[List[int]] - the 2d list of edges
+        """
+        return [[source, target] for source, target in zip(self.edgeSources, self.edgeTargets)]
+
+    @property
+    def edgeList(self):
+        return self.getEdgeList()
+
+    def getVertexList(self):
+        """
+        :return: dict-like view from vertex to its neighbors
+        """
+        return self.vertexList
+
+    def getOutDegree(self, source):
+        """
+        get out degree of a vertex
+        :param source:int - vertex whose degree you want to find
+        :return: int - number of degree of the vertex if exists, -1 if doesn't exist
+        """
+        if source in self.vertexList:
+            return self.getDegree(source)
+        return -1
+
+    def getDirected(self):
+        """
+        :return: Boolean - the type of this graph, directed (True) or undirected (False)
+        """
+        return self.directed
+
+    def getFrom(self):
+        """
+        :return: dict-like view from vertex to its out neighbors
+        """
+        return self.fromNode
+
+    def getTo(self):
+        """
+        :return: dict-like view from vertex to its in neighbors
+        """
+        return self.toNode
+
+    def getFromToCount(self):
+        """
+        :return: return the count of from and to for each vertex (For Directed Graph only)
+        """
+        if not self.directed:
+            return [(0, 0) for _ in self.vertexList]
+        outOffsets, inOffsets = self.outOffsets, self.inOffsets
+        return [(outOffsets[vertex + 1] - outOffsets[vertex], inOffsets[vertex + 1] - inOffsets[vertex])
+                for vertex in self.vertexList]
+
+    def getNeighborMask(self, source):
+        """
+        :param source:int - the vertex
+        :return: int - bitset of the neighbors of source (built on first use and cached)
+        """
+        mask = self.neighborMasks.get(source)
+        if mask is None:
+            mask = Graph.verticesToMask(self.vertexList[source])
+            self.neighborMasks[source] = mask
+        return mask
+
+    def getOutMask(self, source):
+        """
+        :param source:int - the vertex
+        :return: int - bitset of the out neighbors of source (For Directed Graph only)
+        """
+        mask = self.outMasks.get(source)
+        if mask is None:
+            mask = Graph.verticesToMask(self.fromNode[source])
+            self.outMasks[source] = mask
+        return mask
+
+    def getInMask(self, source):
+        """
+        :param source:int - the vertex
+        :return: int - bitset of the in neighbors of source (For Directed Graph only)
+        """
+        mask = self.inMasks.get(source)
+        if mask is None:
+            mask = Graph.verticesToMask(self.toNode[source])
+            self.inMasks[source] = mask
+        return mask
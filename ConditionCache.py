@@ -0,0 +1,112 @@
+from CanonicalForm import CanonicalForm
+import json
+import os
+
+
+class ConditionCache:
+    """
+    A Class to cache the symmetry-breaking conditions and the matching orders of query graphs, keyed by the canonical
+    form of the query so that any relabelling of the same motif hits the same entry. Entries are kept in memory and,
+    when a directory is given, also as one JSON file per canonical form so that later runs skip the work too.
+
+    Methods
+    -------
+    getCanonicalForm: canonical form of a query graph (memoized on its exact edge set)
+
+    getConditions: symmetry-breaking conditions of a query graph, computed on a miss
+
+    getOrder: matching order of a query graph from a root, computed on a miss
+    """
+
+    def __init__(self, directory=None):
+        """
+        Constructor
+        :param directory:string - directory of the on-disk cache (created if needed), None to keep it in memory only
+        """
+        self.directory = directory
+        self.forms = {}
+        self.entries = {}
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def getCanonicalForm(self, queryGraph, directed):
+        """
+        :param queryGraph:Graph - the query graph
+        :param directed:boolean - whether edge directions are part of the form
+        :return: CanonicalForm - the canonical form of queryGraph
+        """
+        exactKey = (directed, frozenset((source, target) for source, target in queryGraph.getEdgeList()))
+        form = self.forms.get(exactKey)
+        if form is None:
+            form = CanonicalForm(queryGraph, directed)
+            self.forms[exactKey] = form
+        return form
+
+    def getConditions(self, queryGraph, directed, compute):
+        """
+        :param queryGraph:Graph - the query graph
+        :param directed:boolean - whether the conditions only break direction-preserving symmetries
+        :param compute:Callable[[], Dict[int, List[List[int]]]] - computes the conditions on a cache miss
+        :return: Dict[int, List[List[int]]] - the symmetry-breaking conditions, in the vertex IDs of queryGraph
+        """
+        form = self.getCanonicalForm(queryGraph, directed)
+        entry = self.loadEntry(form.key)
+        if "conditions" not in entry:
+            conditions = compute()
+            entry["conditions"] = [form.toCanonical(nodesToCheck) for nodesToCheck in
+                                   (nodesToCheck for lists in conditions.values() for nodesToCheck in lists)]
+            self.saveEntry(form.key, entry)
+        conditions = {}
+        for labels in entry["conditions"]:
+            nodesToCheck = form.fromCanonical(labels)
+            "the fixed vertex stays first"
+            nodesToCheck = nodesToCheck[:1] + sorted(nodesToCheck[1:])
+            conditions.setdefault(nodesToCheck[0], []).append(nodesToCheck)
+        return conditions
+
+    def getOrder(self, queryGraph, h, directed, compute):
+        """
+        :param queryGraph:Graph - the query graph
+        :param h:int - the root of the matching order
+        :param directed:boolean - whether edge directions are part of the form
+        :param compute:Callable[[], List[int]] - computes the matching order on a cache miss
+        :return: List[int] - the matching order, in the vertex IDs of queryGraph
+        """
+        form = self.getCanonicalForm(queryGraph, directed)
+        entry = self.loadEntry(form.key)
+        orders = entry.setdefault("orders", {})
+        root = str(form.labelling[h])
+        if root not in orders:
+            orders[root] = form.toCanonical(compute())
+            self.saveEntry(form.key, entry)
+        return form.fromCanonical(orders[root])
+
+    def loadEntry(self, key):
+        """
+        :param key:str - the key of the canonical form
+        :return: Dict - the cached entry (empty if there is none yet)
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = {}
+            if self.directory is not None:
+                try:
+                    with open(os.path.join(self.directory, key + ".json")) as cacheFile:
+                        entry = json.load(cacheFile)
+                except (IOError, ValueError):
+                    entry = {}
+            self.entries[key] = entry
+        return entry
+
+    def saveEntry(self, key, entry):
+        """
+        :param key:str - the key of the canonical form
+        :param entry:Dict - the entry to write to the on-disk cache (written to a temporary file first)
+        """
+        if self.directory is None:
+            return
+        fileName = os.path.join(self.directory, key + ".json")
+        temporaryName = "%s.%d.tmp" % (fileName, os.getpid())
+        with open(temporaryName, "w") as cacheFile:
+            json.dump(entry, cacheFile)
+        os.replace(temporaryName, fileName)
@@ -9,17 +9,26 @@ class Graph:
     ----------
     edgeList:List[List[int]] contains all unique edges in the graph
     vertexList:Dict[int, List[int] contains all unique vertex in the graph
+    edgeIndex:Dict[Tuple[int, int], int] position of every edge in edgeList, for constant time membership tests and
+        removals
+    neighborMasks, outMasks, inMasks:Dict[int, int] lazily built bitsets (bit v set if v is a neighbor)
 
     Methods
     -------
     addEdge: add a edge and its corresponding vertices to the graph
 
+    addEdges: add a batch of edges and their vertices, deduplicating in one pass
+
+    removeEdge: remove an edge, and its vertices if they are left without edges
+
     getNumberofVertices: returns the number of vertices in the graph
 
     getNumberofEdges: return the number of edges in the graph
 
     tryEdge: test if sn edge is is the graph
 
+    hasArc: test if a directed edge is in the graph
+
     getNeighbors: get list of neighbors for requested vertex
 
     getNodesSortedByDegree: left list of verteces that have at least x amount of connected nodes
@@ -32,12 +41,17 @@ class Graph:
 
     getOutDegree: get out degree of a vertex
 
+    getNeighborMask, getOutMask, getInMask: bitset of the (out, in) neighbors of a vertex
+
+    verticesToMask, maskToVertices: convert between a list of vertices and a bitset
+
     """
 
     def __init__(self, inputEdgeList=None, mappings=None, directed=False):
         """
         Constructor: create a graph by updating self.edgeList and self.vertexList
-            :param inputEdgeList:List[List[int]] - Contains list of edges to be used to create a graph
+            :param inputEdgeList:List[List[int]] - Contains list of edges to be used to create a graph,
+                    self loops and duplicate edges are dropped
             :Result: edgeList and vertexList are created and filled to represent
                     the graph
         """
@@ -52,14 +66,13 @@ class Graph:
         self.fromNode = defaultdict(list)
         self.toNode = defaultdict(list)
 
+        self.edgeIndex = {}
+        self.neighborMasks = {}
+        self.outMasks = {}
+        self.inMasks = {}
+
         "Handle Edges"
-        for source, target in inputEdgeList:
-            self.edgeList.append([source, target])
-            self.vertexList[source].append(target)
-            self.vertexList[target].append(source)
-            if self.directed:
-                self.fromNode[source].append(target)
-                self.toNode[target].append(source)
+        self.addEdges(inputEdgeList)
 
     def addEdge(self, edge):
         """
@@ -67,19 +80,87 @@ class Graph:
         :param edge:List[int] - the edge to be added
         :return: Boolean: true if edge is added. false if edge is not added
         """
+        source, target = edge[0], edge[1]
+        if source == target or (source, target) in self.edgeIndex:
+            return False
+        if not self.directed and (target, source) in self.edgeIndex:
+            return False
+        self.edgeIndex[(source, target)] = len(self.edgeList)
+        self.clearMasks()
+        self.edgeList.append([source, target])
+        self.vertexList[source].append(target)
+        self.vertexList[target].append(source)
         if self.directed:
-            if edge not in self.edgeList and edge[0] != edge[1]:
-                self.edgeList.append(edge)
-                self.vertexList[edge[0]].append(edge[1])
-                self.vertexList[edge[1]].append(edge[0])
-                self.fromNode[edge[0]].append(edge[1])
-                self.toNode[edge[1]].append(edge[0])
-        else:
-            if edge not in self.edgeList and [edge[1], edge[0]] not in self.edgeList and edge[0] != edge[1]:
-                self.edgeList.append(edge)
-                self.vertexList[edge[0]].append(edge[1])
-                self.vertexList[edge[1]].append(edge[0])
+            self.fromNode[source].append(target)
+            self.toNode[target].append(source)
+        return True
+
+    def addEdges(self, edges):
+        """
+        addEdges: add a batch of edges, skipping self loops and edges already in the graph or earlier in the batch
+        :param edges:List[List[int]] - the edges to be added
+        :return: int - the number of edges that were added
+        """
+        edgeIndex = self.edgeIndex
+        edgeList = self.edgeList
+        vertexList = self.vertexList
+        fromNode = self.fromNode
+        toNode = self.toNode
+        directed = self.directed
+        self.clearMasks()
+        added = 0
+        for source, target in edges:
+            if source == target or (source, target) in edgeIndex:
+                continue
+            if not directed and (target, source) in edgeIndex:
+                continue
+            edgeIndex[(source, target)] = len(edgeList)
+            edgeList.append([source, target])
+            vertexList[source].append(target)
+            vertexList[target].append(source)
+            if directed:
+                fromNode[source].append(target)
+                toNode[target].append(source)
+            added += 1
+        return added
+
+    def removeEdge(self, edge):
+        """
+        removeEdge: remove an edge (for undirected graphs, in either direction), vertices left without edges are
+            removed too. The last edge of edgeList takes the place of the removed one, so the cost is that of removing
+            the neighbors from the lists of the two vertices (their degree), not a scan of edgeList
+        :param edge:List[int] - the edge to be removed
+        :return: Boolean: true if the edge was removed, false if it is not in the graph
+        """
+        source, target = edge[0], edge[1]
+        if (source, target) not in self.edgeIndex:
+            if self.directed or (target, source) not in self.edgeIndex:
+                return False
+            source, target = target, source
+        position = self.edgeIndex.pop((source, target))
+        self.clearMasks()
+        last = self.edgeList.pop()
+        if position < len(self.edgeList):
+            self.edgeList[position] = last
+            self.edgeIndex[(last[0], last[1])] = position
+        self.removeNeighbor(self.vertexList, source, target)
+        self.removeNeighbor(self.vertexList, target, source)
+        if self.directed:
+            self.removeNeighbor(self.fromNode, source, target)
+            self.removeNeighbor(self.toNode, target, source)
+        return True
 
+    @staticmethod
+    def removeNeighbor(adjacency, source, target):
+        """
+        :param adjacency:Dict[int, List[int]] - vertexList, fromNode or toNode
+        :param source:int - the vertex to remove a neighbor from, removed itself if it has no neighbor left
+        :param target:int - the neighbor
+        """
+        neighbors = adjacency[source]
+        neighbors.remove(target)
+        if not neighbors:
+            del adjacency[source]
 
     def getNumberofVertices(self):
         """
@@ -113,9 +194,18 @@ class Graph:
         :return: boolean - true if edge exist, false otherwise
         """
 
-        if edge in self.edgeList or [edge[1], edge[0]] in self.edgeList:
-            return True
-        return False
+        return (edge[0], edge[1]) in self.edgeIndex or (edge[1], edge[0]) in self.edgeIndex
+
+    def hasArc(self, source, target):
+        """
+        hasArc: check if the directed edge source -> target exists (for undirected graphs, the edge in either direction)
+        :param source:int - tail of the edge
+        :param target:int - head of the edge
+        :return: boolean - true if the edge exists, false otherwise
+        """
+        if self.directed:
+            return (source, target) in self.edgeIndex
+        return (source, target) in self.edgeIndex or (target, source) in self.edgeIndex
 
     def getNeighbors(self, source):
         """
@@ -180,6 +270,76 @@ class Graph:
         """
         return [(len(self.fromNode[vertex]), len(self.toNode[vertex])) for vertex in self.vertexList]
 
+    def getNeighborMask(self, source):
+        """
+        :param source:int - the vertex
+        :return: int - bitset of the neighbors of source (built on first use and cached until the graph changes)
+        """
+        mask = self.neighborMasks.get(source)
+        if mask is None:
+            mask = self.verticesToMask(self.vertexList.get(source, ()))
+            self.neighborMasks[source] = mask
+        return mask
+
+    def getOutMask(self, source):
+        """
+        :param source:int - the vertex
+        :return: int - bitset of the out neighbors of source (For Directed Graph only)
+        """
+        mask = self.outMasks.get(source)
+        if mask is None:
+            mask = self.verticesToMask(self.fromNode.get(source, ()))
+            self.outMasks[source] = mask
+        return mask
+
+    def getInMask(self, source):
+        """
+        :param source:int - the vertex
+        :return: int - bitset of the in neighbors of source (For Directed Graph only)
+        """
+        mask = self.inMasks.get(source)
+        if mask is None:
+            mask = self.verticesToMask(self.toNode.get(source, ()))
+            self.inMasks[source] = mask
+        return mask
+
+    def clearMasks(self):
+        """
+        Drop the cached bitsets, called whenever the edges change
+        """
+        if self.neighborMasks or self.outMasks or self.inMasks:
+            self.neighborMasks = {}
+            self.outMasks = {}
+            self.inMasks = {}
+
+    @staticmethod
+    def verticesToMask(vertices):
+        """
+        :param vertices:Iterable[int] - non-negative vertex IDs
+        :return: int - bitset with the bit of every vertex set
+        """
+        vertices = list(vertices)
+        if not vertices:
+            return 0
+        bits = bytearray(max(vertices) // 8 + 1)
+        for vertex in vertices:
+            bits[vertex >> 3] |= 1 << (vertex & 7)
+        return int.from_bytes(bits, "little")
+
+    @staticmethod
+    def maskToVertices(mask):
+        """
+        :param mask:int - bitset
+        :return: List[int] - the vertices whose bit is set, in ascending order
+        """
+        bits = bin(mask)[:1:-1]
+        vertices = []
+        position = bits.find("1")
+        while position >= 0:
+            vertices.append(position)
+            position = bits.find("1", position + 1)
+        return vertices
+
     """
        *   Testing methods
        *   mostly returns dicts and prints out data
@@ -1,5 +1,10 @@
 from Graph import Graph
-from collections import defaultdict
+from CompactGraph import CompactGraph
+from LabelMapping import LabelMapping
+from array import array
+import os
+import struct
+import sys
 
 
 class GraphProcessor:
@@ -9,21 +14,35 @@ class GraphProcessor:
             'first#ofEdge1 second#ofEdge1
             first#ofEdge2 second#ofEdge2 . . .'
 
+        Edges are parsed in large chunks and the result is cached in a binary file next to the edge list
+        (fileName + cacheSuffix), which is used instead of the text file as long as the text file is unchanged.
+
         Methods
         -------
         loadGraph
-            reads edges from a text file and stores the values in a 2D list
+            reads edges from a text file and stores the values in a 2D list (or a CompactGraph)
+
+        readEdges
+            reads the edges of a text file (or its cache) as arrays of vertex IDs
         """
 
+    chunkSize = 1 << 24
+    cacheSuffix = ".nemocache"
+    cacheMagic = b"NEMOEDG1"
+    "magic, size and modification time of the edge list, number of edges, length of the labels"
+    cacheHeader = struct.Struct("<8sqqqq")
+
     def __init__(self):
         pass
 
-    def loadGraph(self, fileName, directed):
+    def loadGraph(self, fileName, directed, compact=False, cache=True):
         """
         loadGraph: reads edges from a text file and stores the values in a 2D list
         :param graphType: string that identify the input file type 'int' or 'str'
         :param directed: boolean value that identify if the graph is directed
         :param fileName:string The name f the file containing the graph edges
+        :param compact:boolean - build a frozen CompactGraph (CSR arrays) instead of a Graph
+        :param cache:boolean - read the edges from (and save them to) the binary cache next to the file
         :return: Graph - A graph containing the edges from the file
         """
         # if graphType == "int":
@@ -43,19 +62,91 @@ class GraphProcessor:
         # newGraph = Graph(edgeList, None, directed)
         # return newGraph
 
-        mappings = defaultdict(str)
-        edgeList = []
-        with open(fileName) as myFile:
-            for line in myFile:
-                if "#" not in line:  # catch comments
-                    pair = line.split()
-                    if len(pair) == 2:
-                        for node in pair:
-                            if node not in mappings:
-                                mappings[len(mappings.keys()) // 2] = node
-                                mappings[node] = str(len(mappings.keys()) // 2)
-                        if pair[0] != pair[1]:
-                            edge = [int(mappings[pair[0]]), int(mappings[pair[1]])]
-                            edgeList.append(edge)
+        sources, targets, mappings = self.readEdges(fileName, cache)
+        if compact:
+            "straight from the arrays, a large graph is never held as a list of edges"
+            return CompactGraph.fromArrays(sources, targets, mappings, directed)
+        edgeList = [[source, target] for source, target in zip(sources, targets) if source != target]
         newGraph = Graph(edgeList, mappings, directed)
         return newGraph
+
+    def readEdges(self, fileName, cache=True):
+        """
+        readEdges: read the edges of a file as vertex IDs, from the binary cache next to the file when it is up to date
+        :param fileName:string - the name of the file containing the graph edges
+        :param cache:boolean - use (and write) the binary cache
+        :return: (array, array, LabelMapping) - source and target of every edge (self-loops included) and the labels
+        """
+        cacheName = fileName + self.cacheSuffix
+        if cache:
+            loaded = self.readCache(fileName, cacheName)
+            if loaded is not None:
+                return loaded
+        mappings = LabelMapping()
+        ids = array("q")
+        with open(fileName) as myFile:
+            while True:
+                lines = myFile.readlines(self.chunkSize)
+                if not lines:
+                    break
+                "skip comments and lines that don't hold exactly one edge, as the line by line parser did"
+                pairs = [pair for pair in (line.split() for line in lines if "#" not in line) if len(pair) == 2]
+                ids.extend(mappings.intern([node for pair in pairs for node in pair]))
+        sources, targets = ids[0::2], ids[1::2]
+        if cache:
+            self.writeCache(fileName, cacheName, sources, targets, mappings)
+        return sources, targets, mappings
+
+    def readCache(self, fileName, cacheName):
+        """
+        :param fileName:string - the edge list file
+        :param cacheName:string - its binary cache
+        :return: (array, array, LabelMapping) - the cached edges and labels, None if the cache is missing or stale
+        """
+        try:
+            status = os.stat(fileName)
+            with open(cacheName, "rb") as cacheFile:
+                header = cacheFile.read(self.cacheHeader.size)
+                if len(header) != self.cacheHeader.size:
+                    return None
+                magic, size, modified, numberOfEdges, labelBytes = self.cacheHeader.unpack(header)
+                if magic != self.cacheMagic or size != status.st_size or modified != status.st_mtime_ns:
+                    return None
+                sources = array("q")
+                targets = array("q")
+                sources.fromfile(cacheFile, numberOfEdges)
+                targets.fromfile(cacheFile, numberOfEdges)
+                labels = cacheFile.read(labelBytes).decode().split("\n") if labelBytes else []
+        except (OSError, EOFError, struct.error, UnicodeDecodeError):
+            return None
+        if sys.byteorder != "little":
+            sources.byteswap()
+            targets.byteswap()
+        return sources, targets, LabelMapping(labels)
+
+    def writeCache(self, fileName, cacheName, sources, targets, mappings):
+        """
+        writeCache: write the edges and labels of fileName to cacheName, silently skipped if it can't be written
+        :param fileName:string - the edge list file
+        :param cacheName:string - its binary cache
+        :param sources, targets:array - source and target of every edge
+        :param mappings:LabelMapping - the labels
+        """
+        "labels come from str.split, so they can't contain a newline"
+        labels = "\n".join(mappings.labels).encode()
+        try:
+            status = os.stat(fileName)
+            if sys.byteorder != "little":
+                sources, targets = array("q", sources), array("q", targets)
+                sources.byteswap()
+                targets.byteswap()
+            temporaryName = "%s.%d.tmp" % (cacheName, os.getpid())
+            with open(temporaryName, "wb") as cacheFile:
+                cacheFile.write(self.cacheHeader.pack(self.cacheMagic, status.st_size, status.st_mtime_ns,
+                                                      len(sources), len(labels)))
+                sources.tofile(cacheFile)
+                targets.tofile(cacheFile)
+                cacheFile.write(labels)
+            os.replace(temporaryName, cacheName)
+        except OSError:
+            pass
@@ -0,0 +1,177 @@
+from AutomorphismGroup import AutomorphismGroup
+from QueryPlan import QueryPlan
+from Utility import Utility
+
+
+class IncrementalCounter:
+    """
+    A Class to keep the motif count of an evolving input graph up to date.
+    Adding or removing the edge (u, v) only changes the occurrences that contain both u and v, so instead of a full
+    recount the occurrences containing u and v are counted before and after the change, with searches anchored at
+    the two endpoints: for every ordered pair (a, b) of query vertices, the embeddings that map a to u and b to v.
+    Every occurrence containing u and v is found |Aut| times that way (once per automorphism), so the sum divided by
+    the order of the automorphism group of the query graph is the number of occurrences. Occurrences are induced, so
+    only the pairs (a, b) joined by an edge a -> b can be mapped onto u and v while the edge u -> v is in the graph,
+    and only the other pairs while it is not: every update searches with the half of the pairs that fits each side.
+
+    Attributes
+    ----------
+    count:int - the number of occurrences of the query graph in the current input graph
+
+    Methods
+    -------
+    addEdge, removeEdge: change the input graph and update the count
+
+    applyBatch: apply a batch of changes
+
+    countContaining: the number of occurrences that contain two input vertices
+    """
+
+    def __init__(self, queryGraph, inputGraph, count=None):
+        """
+        Constructor
+        :param queryGraph:Graph - the query graph
+        :param inputGraph:Graph - the input graph, changed through this counter from now on
+        :param count:int - the count of the query graph in the input graph if already known, by default it is
+            counted with Utility.algorithm2_modified
+        """
+        self.queryGraph = queryGraph
+        self.inputGraph = inputGraph
+        self.directed = queryGraph.getDirected() and inputGraph.getDirected()
+        self.utility = Utility()
+        if count is None:
+            h = queryGraph.getNodesSortedByDegree(0)[-1]
+            count = self.utility.algorithm2_modified(queryGraph, inputGraph, h, 0, mode="count")
+        self.count = count
+        self.automorphisms = AutomorphismGroup(queryGraph, self.directed).getOrder()
+        "no symmetry-breaking conditions, the anchors already fix which automorphic copy is found"
+        vertices = queryGraph.getVertexList()
+        "the plans of the pairs (a, b) with and without the edge a -> b"
+        self.plans = {True: [], False: []}
+        for a in vertices:
+            mask = queryGraph.getOutMask(a) if self.directed else queryGraph.getNeighborMask(a)
+            for b in vertices:
+                if a != b:
+                    plan = QueryPlan(queryGraph, self.getAnchoredOrder(a, b), {}, self.directed)
+                    self.plans[bool(mask >> b & 1)].append((plan, b))
+
+    def getAnchoredOrder(self, a, b):
+        """
+        The matching order starting from a, with b right after it when they are adjacent so that the second anchor
+        prunes the search as early as possible
+        :param a:int - query vertex mapped to the first endpoint
+        :param b:int - query vertex mapped to the second endpoint
+        :return: List[int] - the query vertices in matching order
+        """
+        if not self.queryGraph.getNeighborMask(a) >> b & 1:
+            return self.utility.getMatchingOrder(self.queryGraph, a)
+        order = [a, b]
+        while len(order) < len(self.queryGraph.getVertexList()):
+            m = self.utility.getMostConstrainedNeighbour(sorted(order), self.queryGraph)
+            if m < 0:
+                break
+            order.append(m)
+        return order
+
+    def countContaining(self, u, v, adjacent=None):
+        """
+        countContaining: count the occurrences of the query graph whose vertices include u and v
+        :param u:int - an input vertex
+        :param v:int - another input vertex
+        :param adjacent:boolean - whether the edge u -> v is in the input graph, by default it is looked up
+        :return: int - the number of occurrences
+        """
+        vertexList = self.inputGraph.getVertexList()
+        if u == v or u not in vertexList or v not in vertexList:
+            return 0
+        if adjacent is None:
+            adjacent = self.inputGraph.hasArc(u, v)
+        embeddings = 0
+        for plan, b in self.plans[adjacent]:
+            if plan.size:
+                embeddings += self.extendAnchored([u], plan, plan.position[b], v)
+        return embeddings // self.automorphisms
+
+    def extendAnchored(self, images, plan, anchorDepth, anchor):
+        """
+        Count the embeddings extending a partial map, like Utility.isomorphicExtensionWithPlan without symmetry
+        breaking and with the query vertex at anchorDepth mapped to anchor
+        :param images:List[int] - images of the first len(images) query vertices of plan.order (restored on return)
+        :param plan:QueryPlan - the plan, without symmetry-breaking conditions
+        :param anchorDepth:int - position of the anchored query vertex in plan.order
+        :param anchor:int - its image
+        :return: int - number of embeddings
+        """
+        depth = len(images)
+        if depth == plan.size:
+            return 1
+        inputGraph = self.inputGraph
+        utility = self.utility
+
+        adjacentLists = sorted((inputGraph.getNeighbors(images[j]) for j in plan.adjacent[depth]), key=len)
+        candidates = adjacentLists[0]
+        for neighbors in adjacentLists[1:]:
+            candidates = utility.intersectSorted(candidates, neighbors)
+        if depth == anchorDepth:
+            candidates = [anchor] if anchor in candidates else []
+        for j in plan.nonAdjacent[depth]:
+            candidates = utility.subtractSorted(candidates, inputGraph.getNeighbors(images[j]))
+
+        embeddings = 0
+        previous = None
+        for n in candidates:
+            if n == previous:
+                continue
+            previous = n
+            if n in images or depth < anchorDepth and n == anchor:
+                continue
+            if plan.directed and not all(inputGraph.hasArc(n, images[j]) == arcOut and
+                                         inputGraph.hasArc(images[j], n) == arcIn
+                                         for j, arcOut, arcIn in plan.arcs[depth]):
+                continue
+            images.append(n)
+            embeddings += self.extendAnchored(images, plan, anchorDepth, anchor)
+            images.pop()
+        return embeddings
+
+    def addEdge(self, edge):
+        """
+        addEdge: add an edge to the input graph and update the count
+        :param edge:List[int] - the edge
+        :return: boolean - true if the edge was added, false if it was already in the graph
+        """
+        u, v = edge[0], edge[1]
+        if self.inputGraph.hasArc(u, v):
+            return False
+        before = self.countContaining(u, v, False)
+        if not self.inputGraph.addEdge([u, v]):
+            return False
+        self.count += self.countContaining(u, v, True) - before
+        return True
+
+    def removeEdge(self, edge):
+        """
+        removeEdge: remove an edge from the input graph and update the count
+        :param edge:List[int] - the edge
+        :return: boolean - true if the edge was removed, false if it was not in the graph
+        """
+        u, v = edge[0], edge[1]
+        if not self.inputGraph.hasArc(u, v):
+            return False
+        before = self.countContaining(u, v, True)
+        self.inputGraph.removeEdge([u, v])
+        self.count += self.countContaining(u, v, False) - before
+        return True
+
+    def applyBatch(self, added=(), removed=()):
+        """
+        applyBatch: remove then add edges, one at a time so that every occurrence is updated exactly once
+        :param added:List[List[int]] - edges to add
+        :param removed:List[List[int]] - edges to remove
+        :return: int - the new count
+        """
+        for edge in removed:
+            self.removeEdge(edge)
+        for edge in added:
+            self.addEdge(edge)
+        return self.count
@@ -0,0 +1,69 @@
+class LabelMapping:
+    """
+    A Class to store the bidirectional mapping between the vertex labels of an input file and the integer vertex IDs
+    used by Graph. IDs are 0..n-1 in first-seen order, so the labels are kept in a plain list and only the reverse
+    direction needs a dict.
+    For compatibility with the mappings built by earlier versions of GraphProcessor, mappings[id] is the label of a
+    vertex and mappings[label] its ID as a string.
+
+    Methods
+    -------
+    intern: add labels, return their IDs
+
+    getLabel: the label of an ID
+
+    getId: the ID of a label
+    """
+
+    def __init__(self, labels=None):
+        """
+        Constructor
+        :param labels:List[str] - the label of every ID, in ID order
+        """
+        self.labels = []
+        self.ids = {}
+        if labels is not None:
+            self.intern(labels)
+
+    def intern(self, labels):
+        """
+        intern: give an ID to every label not seen before
+        :param labels:List[str] - labels, possibly repeated
+        :return: List[int] - the ID of every label
+        """
+        ids = self.ids
+        for label in dict.fromkeys(labels):
+            if label not in ids:
+                ids[label] = len(self.labels)
+                self.labels.append(label)
+        return list(map(ids.__getitem__, labels))
+
+    def getLabel(self, vertex):
+        """
+        :param vertex:int - a vertex ID
+        :return: str - its label
+        """
+        return self.labels[vertex]
+
+    def getId(self, label):
+        """
+        :param label:str - a vertex label
+        :return: int - its ID
+        """
+        return self.ids[label]
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self.labels[key]
+        return str(self.ids[key])
+
+    def __contains__(self, key):
+        if isinstance(key, int):
+            return 0 <= key < len(self.labels)
+        return key in self.ids
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __iter__(self):
+        return iter(self.labels)
@@ -0,0 +1,97 @@
+from CanonicalForm import CanonicalForm
+from CompactGraph import CompactGraph
+from Graph import Graph
+from SearchEngine import SearchEngine
+from Utility import Utility
+from bisect import bisect_left
+
+
+class MotifBatch:
+    """
+    A Class to count many query graphs (for example all the k-node motifs) in one input graph.
+    The input graph is converted to a CompactGraph and sorted by degree once, the conditions and plans of the
+    queries come from Utility.conditionCache, and the search is root-major: every root is extended for all the
+    queries in turn, so its neighborhood and the hub bitsets (shared by all the SearchEngines) are reused while hot.
+
+    Methods
+    -------
+    count: count every query graph
+
+    generateMotifs: all connected k-node query graphs, one per isomorphism class
+    """
+
+    def __init__(self, inputGraph, hubDegree=None):
+        """
+        Constructor
+        :param inputGraph:Graph or CompactGraph - reference to input graph
+        :param hubDegree:int - see SearchEngine
+        """
+        if not isinstance(inputGraph, CompactGraph):
+            inputGraph = CompactGraph.fromGraph(inputGraph)
+        self.inputGraph = inputGraph
+        self.hubDegree = hubDegree
+        self.roots = inputGraph.getNodesSortedByDegree(0)
+        self.degrees = [inputGraph.getDegree(root) for root in self.roots]
+        self.hubMasks = {}
+
+    def count(self, queryGraphs):
+        """
+        count: count the graphlets of every query graph (the same counts as Utility.algorithm2_modified with
+            isRandomGraph set and fewer than 30 roots, or with the "count" mode)
+        :param queryGraphs:List[Graph] - the query graphs
+        :return: List[(Graph, int)] - every query graph with its count, in the order of queryGraphs
+        """
+        utility = Utility()
+        utility.random = True
+        engines = []
+        for queryGraph in queryGraphs:
+            h = queryGraph.getNodesSortedByDegree(0)[-1]
+            directed = queryGraph.getDirected() and self.inputGraph.getDirected()
+            plan = utility.createQueryPlan(queryGraph, h, utility.getConditions(queryGraph, h, directed), directed)
+            searchEngine = SearchEngine(queryGraph, self.inputGraph, plan, utility, self.hubDegree, self.hubMasks)
+            "roots with a smaller degree than h can't be its image"
+            engines.append((bisect_left(self.degrees, queryGraph.getOutDegree(h)), searchEngine))
+
+        counts = [0] * len(engines)
+        for index, root in enumerate(self.roots):
+            for query, (first, searchEngine) in enumerate(engines):
+                if index >= first:
+                    counts[query] += searchEngine.countRoot(root)
+        return list(zip(queryGraphs, counts))
+
+    @staticmethod
+    def generateMotifs(k, directed=False):
+        """
+        generateMotifs: every connected graph on k vertices is a connected graph on k - 1 vertices plus a vertex
+            joined to some of them, so the motifs are grown one vertex at a time and deduplicated by CanonicalForm
+        :param k:int - number of vertices, at least 2
+        :param directed:boolean - generate directed motifs (every pair of vertices is unconnected, an edge in either
+            direction or a pair of opposite edges)
+        :return: List[Graph] - one query graph per isomorphism class, vertices 0..k-1
+        """
+        if k < 2:
+            raise ValueError("motifs have at least 2 vertices")
+        motifs = [[[0, 1]], [[0, 1], [1, 0]]] if directed else [[[0, 1]]]
+        "the ways a new vertex can be joined to an old one: edges from the old vertex, to it, or both"
+        joins = [[True, False], [False, True], [True, True]] if directed else [[True, False]]
+        for size in range(3, k + 1):
+            grown = {}
+            for edges in motifs:
+                choices = [[]]
+                for vertex in range(size - 1):
+                    choices = [choice + [join] for choice in choices for join in [None] + joins]
+                for choice in choices:
+                    if all(join is None for join in choice):
+                        continue
+                    newEdges = [list(edge) for edge in edges]
+                    for vertex, join in enumerate(choice):
+                        if join is not None:
+                            if join[0]:
+                                newEdges.append([vertex, size - 1])
+                            if join[1]:
+                                newEdges.append([size - 1, vertex])
+                    key = CanonicalForm(Graph(newEdges, directed=directed)).key
+                    if key not in grown:
+                        grown[key] = newEdges
+            motifs = list(grown.values())
+        return [Graph(edges, directed=directed) for edges in motifs]
@@ -0,0 +1,228 @@
+from CompactGraph import CompactGraph
+from Graph import Graph
+from GraphProcessor import GraphProcessor
+from LabelMapping import LabelMapping
+from RandomGraphEnsemble import RandomGraphEnsemble
+from Utility import Utility
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+import argparse
+import json
+
+_workerGraphs = {}
+
+
+def loadNamedGraph(fileName, directed):
+    """
+    Load an input graph for the server: files written by CompactGraph.save are memory-mapped (so all the workers
+    share one page-cached copy), edge lists are loaded as a CompactGraph through the binary cache of GraphProcessor
+    :param fileName:string - the graph file
+    :param directed:boolean - whether the graph is directed (edge lists only)
+    :return: CompactGraph - the graph
+    """
+    with open(fileName, "rb") as graphFile:
+        magic = graphFile.read(len(CompactGraph.fileMagic))
+    if magic == CompactGraph.fileMagic:
+        return CompactGraph.open(fileName)
+    return GraphProcessor().loadGraph(fileName, directed, compact=True)
+
+
+def _initWorker(graphFiles):
+    """
+    Process pool initializer: load every named graph once, they stay in the worker for all the requests
+    :param graphFiles:Dict[str, (str, boolean)] - file name and directedness of every graph
+    """
+    for name, (fileName, directed) in graphFiles.items():
+        _workerGraphs[name] = loadNamedGraph(fileName, directed)
+
+
+def _serveRequest(task):
+    """
+    Answer one request in a worker process
+    :param task:(str, Dict[str, object]) - the action (count, enumerate or significance) and the request
+    :return: Dict[str, object] - the answer
+    """
+    action, request = task
+    inputGraph = _workerGraphs[request["graph"]]
+    "Graph indexes its bitsets by vertex ID: relabel the query to 0..k-1, keeping the order of the request's IDs"
+    labels = LabelMapping(sorted({vertex for edge in request["query"] for vertex in edge}))
+    queryGraph = Graph([labels.intern(edge) for edge in request["query"]], directed=inputGraph.getDirected())
+    h = queryGraph.getNodesSortedByDegree(0)[-1]
+    utility = Utility()
+    start = perf_counter()
+    if action == "count":
+        mode = request.get("mode", "count")
+        if mode not in ("count", "exists", "topk"):
+            raise ValueError("unknown mode: %s" % mode)
+        result = utility.algorithm2_modified(queryGraph, inputGraph, h, 0, engine="iterative", mode=mode,
+                                             k=request.get("k"))
+        if mode == "topk":
+            answer = {"matches": [[inputGraph.mappings[vertex] for vertex in match] for match in result]}
+        else:
+            answer = {mode: result}
+    elif action == "enumerate":
+        limit = request.get("limit")
+        answer = {"matches": [[inputGraph.mappings[vertex] for vertex in match]
+                              for match in utility.iterateMatches(queryGraph, inputGraph, h, limit)]}
+    elif action == "significance":
+        count = utility.algorithm2_modified(queryGraph, inputGraph, h, 0, engine="iterative", mode="count")
+        ensemble = RandomGraphEnsemble(workers=1, seed=request.get("seed"),
+                                       method=request.get("method", "configuration"))
+        answer = ensemble.run(queryGraph, inputGraph, h, count, request.get("randomGraphs", 10))
+        answer["count"] = count
+    else:
+        raise ValueError("unknown action: %s" % action)
+    answer["seconds"] = perf_counter() - start
+    return answer
+
+
+class MotifServer:
+    """
+    A Class to keep named input graphs in memory and answer motif requests over HTTP on localhost.
+    Every worker process of the pool loads the graphs once, then requests are served concurrently (one thread per
+    connection, one worker process per request) and the symmetry-breaking conditions of the queries stay cached
+    in the workers.
+
+    Requests are JSON objects POSTed to /count, /enumerate or /significance, with the name of the graph and the
+    query as a list of edges, e.g. {"graph": "ppi", "query": [[0, 1], [1, 2], [2, 0]]}:
+        /count - "mode": "count" (default), "exists" or "topk" (with "k")
+        /enumerate - "limit": stop after this many graphlets
+        /significance - "randomGraphs", "seed" and "method" (see RandomGraphEnsemble)
+    GET /graphs lists the graphs. Answers are JSON objects, errors have an "error" field.
+
+    Methods
+    -------
+    start: load the graphs and start the worker pool
+
+    serveForever: answer requests until shutdown
+
+    handle: answer one request
+    """
+
+    def __init__(self, graphFiles, host="127.0.0.1", port=8765, workers=None):
+        """
+        Constructor
+        :param graphFiles:Dict[str, (str, boolean)] - file name and directedness of every graph, by name
+        :param host:string - address to listen on
+        :param port:int - port to listen on, 0 for any free port
+        :param workers:int - number of worker processes, None for one per CPU
+        """
+        self.graphFiles = dict(graphFiles)
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.graphs = {}
+        self.executor = None
+        self.httpServer = None
+
+    def start(self):
+        """
+        start: load the graphs (so a bad file fails here, not in a worker), start the pool and bind the socket
+        """
+        for name, (fileName, directed) in self.graphFiles.items():
+            graph = loadNamedGraph(fileName, directed)
+            self.graphs[name] = {"vertices": graph.getNumberofVertices(), "edges": graph.getNumberofEdges(),
+                                 "directed": graph.getDirected()}
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_initWorker,
+                                            initargs=(self.graphFiles,))
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") == "/graphs":
+                    self.reply(200, {"graphs": server.graphs})
+                else:
+                    self.reply(404, {"error": "unknown path: %s" % self.path})
+
+            def do_POST(self):
+                try:
+                    request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                except ValueError as error:
+                    self.reply(400, {"error": "invalid JSON: %s" % error})
+                    return
+                status, answer = server.handle(self.path.strip("/"), request)
+                self.reply(status, answer)
+
+            def reply(self, status, answer):
+                body = json.dumps(answer).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpServer = ThreadingHTTPServer((self.host, self.port), RequestHandler)
+        self.port = self.httpServer.server_address[1]
+
+    def handle(self, action, request):
+        """
+        handle: check a request and answer it in a worker process
+        :param action:str - count, enumerate or significance
+        :param request:Dict[str, object] - the request
+        :return: (int, Dict[str, object]) - HTTP status and answer
+        """
+        if action not in ("count", "enumerate", "significance"):
+            return 404, {"error": "unknown action: %s" % action}
+        if not isinstance(request, dict) or request.get("graph") not in self.graphs:
+            return 400, {"error": "unknown graph, expected one of %s" % sorted(self.graphs)}
+        query = request.get("query")
+        if not isinstance(query, list) or not query or \
+                not all(isinstance(edge, list) and len(edge) == 2 and all(isinstance(vertex, int) for vertex in edge)
+                        for edge in query):
+            return 400, {"error": "the query must be a non-empty list of [source, target] integer pairs"}
+        try:
+            return 200, self.executor.submit(_serveRequest, (action, request)).result()
+        except (ValueError, TypeError) as error:
+            return 400, {"error": str(error)}
+        except Exception as error:
+            return 500, {"error": "%s: %s" % (type(error).__name__, error)}
+
+    def serveForever(self):
+        """
+        serveForever: answer requests until shutdown is called (from another thread) or the process is interrupted
+        """
+        try:
+            self.httpServer.serve_forever()
+        finally:
+            self.httpServer.server_close()
+            self.executor.shutdown()
+
+    def shutdown(self):
+        """
+        shutdown: stop serveForever
+        """
+        self.httpServer.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve motif counts of resident input graphs on localhost")
+    parser.add_argument("--graph", action="append", default=[], metavar="NAME=FILE",
+                        help="an undirected input graph (edge list, or a file written by CompactGraph.save)")
+    parser.add_argument("--directed-graph", action="append", default=[], metavar="NAME=FILE",
+                        help="a directed input graph")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    arguments = parser.parse_args()
+
+    graphFiles = {}
+    for specs, directed in ((arguments.graph, False), (arguments.directed_graph, True)):
+        for spec in specs:
+            name, separator, fileName = spec.partition("=")
+            if not separator or not name or not fileName:
+                parser.error("graphs are given as NAME=FILE, not %s" % spec)
+            graphFiles[name] = (fileName, directed)
+    if not graphFiles:
+        parser.error("no graph to serve")
+
+    motifServer = MotifServer(graphFiles, arguments.host, arguments.port, arguments.workers)
+    motifServer.start()
+    print("Serving %s on http://%s:%d" % (", ".join(sorted(graphFiles)), motifServer.host, motifServer.port))
+    try:
+        motifServer.serveForever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,66 @@
+class QueryPlan:
+    """
+    A Class to hold the precompiled matching plan of a query graph for a fixed root h.
+    For a fixed root the most constrained neighbour chosen at every recursion level is always the same,
+    so the matching order and the checks to do at every step are computed once and reused for every root
+    vertex of the input graph.
+
+    Attributes
+    ----------
+    order:List[int] - the query vertices in matching order, order[0] is the root h
+    position:Dict[int, int] - position of every query vertex in order
+    size:int - number of query vertices (0 if the query graph is not connected, no mapping is possible)
+    adjacent:List[List[int]] - for every step, the earlier positions whose image must be adjacent to the candidate
+    nonAdjacent:List[List[int]] - for every step, the earlier positions whose image must not be adjacent to the
+        candidate
+    lowerBounds:List[List[int]] - for every step, the earlier positions whose image must be smaller than the candidate
+    upperBounds:List[List[int]] - for every step, the earlier positions whose image must be larger than the candidate
+    directed:boolean - whether edge directions are matched
+    arcs:List[List[Tuple[int, bool, bool]]] - for every step and every adjacent earlier position j, whether the
+        candidate must have an edge to the image of j and whether the image of j must have an edge to the candidate
+        (an edge that is not in the query must not be in the input either)
+    """
+
+    def __init__(self, queryGraph, order, symBreakCondition, directed=False):
+        """
+        Constructor: compile the plan
+        :param queryGraph:Graph - the query graph
+        :param order:List[int] - the query vertices in matching order (see Utility.createQueryPlan)
+        :param symBreakCondition:Dict[int, List[List[int]]] - symmetry-breaking conditions, for every list the
+            image of the fixed (first) vertex must be smaller than the images of the other vertices of the list
+        :param directed:boolean - match edge directions (queryGraph must be directed)
+        """
+        self.order = list(order)
+        self.position = {vertex: index for index, vertex in enumerate(self.order)}
+        self.size = len(self.order) if len(self.order) == len(queryGraph.getVertexList()) else 0
+        self.adjacent = [[]]
+        self.nonAdjacent = [[]]
+        self.lowerBounds = [[] for _ in self.order]
+        self.upperBounds = [[] for _ in self.order]
+        self.directed = directed
+        self.arcs = [[]]
+
+        for index in range(1, len(self.order)):
+            neighborMask = queryGraph.getNeighborMask(self.order[index])
+            earlier = self.order[:index]
+            self.adjacent.append([self.position[vertex] for vertex in earlier if neighborMask >> vertex & 1])
+            self.nonAdjacent.append([self.position[vertex] for vertex in earlier if not neighborMask >> vertex & 1])
+            if directed:
+                outMask = queryGraph.getOutMask(self.order[index])
+                inMask = queryGraph.getInMask(self.order[index])
+                self.arcs.append([(self.position[vertex], bool(outMask >> vertex & 1), bool(inMask >> vertex & 1))
+                                  for vertex in earlier if neighborMask >> vertex & 1])
+            else:
+                self.arcs.append([])
+
+        "a condition f(fixed) < f(other) is checked when the later of the two vertices is mapped"
+        for conditions in symBreakCondition.values():
+            for nodesToCheck in conditions:
+                fixed = nodesToCheck[0]
+                for other in nodesToCheck[1:]:
+                    if fixed not in self.position or other not in self.position:
+                        continue
+                    if self.position[fixed] < self.position[other]:
+                        self.lowerBounds[self.position[other]].append(self.position[fixed])
+                    else:
+                        self.upperBounds[self.position[fixed]].append(self.position[other])
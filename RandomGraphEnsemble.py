@@ -0,0 +1,117 @@
+from RandomGraphGenerator import RandomGraphGenerator
+from Utility import Utility
+from concurrent.futures import ProcessPoolExecutor
+from statistics import pstdev
+import random
+
+_workerState = {}
+
+
+def _initWorker(queryGraph, inputGraph, h, method):
+    """
+    Process pool initializer: keep the graphs in the worker so they are pickled once per worker, not once per task
+    """
+    _workerState["queryGraph"] = queryGraph
+    _workerState["inputGraph"] = inputGraph
+    _workerState["h"] = h
+    _workerState["method"] = method
+
+
+def _countRandomGraphs(task):
+    """
+    Generate a chunk of random graphs from one seed and count the query in each of them
+    :param task:(int, int) - seed of the chunk and number of random graphs in it
+    :return: List[int] - the count for every random graph of the chunk
+    """
+    seed, numberOfGraphs = task
+    queryGraph = _workerState["queryGraph"]
+    inputGraph = _workerState["inputGraph"]
+    h = _workerState["h"]
+    generator = RandomGraphGenerator(seed)
+    if _workerState["method"] == "switching":
+        randomGraphs = generator.generateBySwitching(inputGraph, numberOfGraphs)
+    else:
+        randomGraphs = (generator.generateConfigurationModel(inputGraph) for _ in range(numberOfGraphs))
+    "the roots of large random graphs are sampled by continuing the stream the graphs were drawn from, not replaying it"
+    return [Utility().algorithm2_modified(queryGraph, randomGraph, h, 1, rng=generator.random)
+            for randomGraph in randomGraphs]
+
+
+class RandomGraphEnsemble:
+    """
+    A Class to compute the significance of a motif count against an ensemble of random graphs, with the random
+    graphs generated and counted in parallel by a process pool
+
+    Methods
+    -------
+    run: count the query in numberOfGraphs random graphs and return the p-value, mean, pstdev and z-score
+    """
+
+    def __init__(self, workers=None, chunkSize=1, seed=None, method="configuration"):
+        """
+        Constructor
+        :param workers:int - number of worker processes, None for one per CPU, 1 to run in this process
+        :param chunkSize:int - number of random graphs generated and counted per task
+        :param seed: master seed, every chunk gets its own seed derived from it so runs are reproducible
+        :param method:str - "configuration" (RandomGraphGenerator.generateConfigurationModel) or
+            "switching" (RandomGraphGenerator.generateBySwitching, one Markov chain per chunk)
+        """
+        if chunkSize < 1:
+            raise ValueError("chunkSize must be at least 1")
+        if method not in ("configuration", "switching"):
+            raise ValueError("unknown random graph method: %s" % method)
+        self.workers = workers
+        self.chunkSize = chunkSize
+        self.seed = seed
+        self.method = method
+
+    def run(self, queryGraph, inputGraph, h, totalMappings, numberOfGraphs):
+        """
+        Count the query graph in numberOfGraphs random graphs with the degree sequence of inputGraph
+        :param queryGraph:Graph - reference to query graph
+        :param inputGraph:Graph - reference to input graph
+        :param h:int - the starting node h of query graph (see Utility.algorithm2_modified)
+        :param totalMappings:int - the count of the query graph in inputGraph
+        :param numberOfGraphs:int - number of random graphs
+        :return: Dict[str, object] - counts (per random graph), countN (random counts >= totalMappings), pValue,
+            mean, stdev (population standard deviation) and zScore ("undefined" when stdev is 0)
+        """
+        masterRandom = random.Random(self.seed)
+        tasks = []
+        remaining = numberOfGraphs
+        while remaining > 0:
+            size = min(self.chunkSize, remaining)
+            tasks.append((masterRandom.getrandbits(64), size))
+            remaining -= size
+
+        counts = []
+        if self.workers == 1:
+            _initWorker(queryGraph, inputGraph, h, self.method)
+            for task in tasks:
+                counts.extend(_countRandomGraphs(task))
+        elif tasks:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_initWorker,
+                                     initargs=(queryGraph, inputGraph, h, self.method)) as executor:
+                for chunk in executor.map(_countRandomGraphs, tasks):
+                    counts.extend(chunk)
+        return self.summarize(totalMappings, counts)
+
+    @staticmethod
+    def summarize(totalMappings, counts):
+        """
+        :param totalMappings:int - the count of the query graph in the input graph
+        :param counts:List[int] - the counts of the query graph in the random graphs
+        :return: Dict[str, object] - see run
+        """
+        result = {"counts": counts, "countN": 0, "pValue": None, "mean": None, "stdev": None, "zScore": None}
+        if not counts:
+            return result
+        countN = sum(1 for count in counts if count >= totalMappings)
+        mean = sum(counts) / len(counts)
+        stdev = pstdev(counts)
+        result["countN"] = countN
+        result["pValue"] = countN / len(counts)
+        result["mean"] = mean
+        result["stdev"] = stdev
+        result["zScore"] = "undefined" if stdev == 0.0 else (totalMappings - mean) / stdev
+        return result
@@ -1,11 +1,32 @@
 from Graph import Graph
+from LabelMapping import LabelMapping
+from itertools import accumulate, chain, repeat
 import random
 
 
 class RandomGraphGenerator:
+    """
+    A Class to generate random graphs with the degree sequence of an input graph, and synthetic input graphs
 
-    def __init__(self):
-        pass
+    Methods
+    -------
+    generate: pick edges by drawing random stubs one at a time
+
+    generateConfigurationModel: configuration model in O(E), stubs are shuffled once and paired off
+
+    generateBySwitching: stream of random graphs from a degree-preserving double edge swap Markov chain
+
+    generateErdosRenyi: uniform random graph with a given number of vertices and edges
+
+    generatePowerLaw: random graph with a power-law expected degree sequence (Chung-Lu)
+    """
+
+    def __init__(self, seed=None):
+        """
+        Constructor
+        :param seed: seed of the random number generator, the same seed gives the same sequence of random graphs
+        """
+        self.random = random.Random(seed)
 
     def generate(self, inputGraph):
         randomGraph = Graph(directed=inputGraph.getDirected())
@@ -28,14 +49,14 @@ class RandomGraphGenerator:
                     for degree in range(indegreeSeqVector[vertex]):
                         inVertexList.append(vertex)
 
-        random.shuffle(vertexList)
+        self.random.shuffle(vertexList)
         if inputGraph.getDirected():
-            random.shuffle(inVertexList)
+            self.random.shuffle(inVertexList)
         " create edges "
         while len(vertexList) > 0:
             if inputGraph.getDirected():
-                u = random.randrange(0, len(vertexList))
-                v = random.randrange(0, len(inVertexList))
+                u = self.random.randrange(0, len(vertexList))
+                v = self.random.randrange(0, len(inVertexList))
                 edgeVertexU = vertexList[u]
                 edgeVertexV = inVertexList[v]
 
@@ -43,10 +64,10 @@ class RandomGraphGenerator:
                 inVertexList = inVertexList[:v] + inVertexList[v + 1:]
                 randomGraph.addEdge([edgeVertexU, edgeVertexV])
             else:
-                u = random.randrange(0, len(vertexList))
-                v = random.randrange(0, len(vertexList))
+                u = self.random.randrange(0, len(vertexList))
+                v = self.random.randrange(0, len(vertexList))
                 while v == u:
-                    v = random.randrange(0, len(vertexList))
+                    v = self.random.randrange(0, len(vertexList))
                 if u > v:
                     temp = u
                     u = v
@@ -58,3 +79,133 @@ class RandomGraphGenerator:
                 randomGraph.addEdge([edgeVertexV, edgeVertexU])
 
         return randomGraph
+
+    def generateConfigurationModel(self, inputGraph):
+        """
+        Configuration model: every vertex gets one stub per edge end, the stubs are shuffled once and paired off,
+        self loops and multi-edges are then rejected in bulk (so a few stubs may be lost). The random graph keeps
+        the vertex IDs and mappings of inputGraph, and for directed graphs each vertex keeps its out and in degree.
+        :param inputGraph:Graph - the graph whose degree sequence is used
+        :return: Graph - the random graph
+        """
+        vertices = list(inputGraph.getVertexList())
+        randomGraph = Graph(directed=inputGraph.getDirected(), mappings=inputGraph.mappings)
+        if inputGraph.getDirected():
+            outNodes = inputGraph.getFrom()
+            inNodes = inputGraph.getTo()
+            outStubs = list(chain.from_iterable(repeat(vertex, len(outNodes.get(vertex, ()))) for vertex in vertices))
+            inStubs = list(chain.from_iterable(repeat(vertex, len(inNodes.get(vertex, ()))) for vertex in vertices))
+            self.random.shuffle(inStubs)
+            randomGraph.addEdges(zip(outStubs, inStubs))
+        else:
+            vertexList = inputGraph.getVertexList()
+            stubs = list(chain.from_iterable(repeat(vertex, len(vertexList[vertex])) for vertex in vertices))
+            self.random.shuffle(stubs)
+            randomGraph.addEdges(zip(stubs[0::2], stubs[1::2]))
+        return randomGraph
+
+    def generateBySwitching(self, inputGraph, numberOfGraphs=None, swapsPerSample=None, startGraph=None):
+        """
+        Double edge swap Markov chain: each step picks two edges (a, b) and (c, d) and rewires them to (a, d) and
+        (c, b) unless that creates a self loop or a multi-edge, so every vertex keeps exactly its degree (its out and
+        in degree for directed graphs). Each sample continues the chain from the previous one.
+        :param inputGraph:Graph - the graph whose degrees are preserved
+        :param numberOfGraphs:int - number of graphs to yield, None for an endless stream
+        :param swapsPerSample:int - successful swaps between two samples, defaults to 10 times the number of edges
+        :param startGraph:Graph - graph to start the chain from (e.g. the last sample of an earlier run),
+            defaults to inputGraph
+        :return: Iterator[Graph] - the random graphs
+        """
+        if startGraph is None:
+            startGraph = inputGraph
+        directed = inputGraph.getDirected()
+        edges = [(source, target) for source, target in startGraph.getEdgeList()]
+        edgeIndex = set(edges)
+        if not directed:
+            edgeIndex.update((target, source) for source, target in edges)
+        numberOfEdges = len(edges)
+        if swapsPerSample is None:
+            swapsPerSample = 10 * numberOfEdges
+        "give up on a sample after this many rejected attempts (e.g. complete or star graphs have no valid swap)"
+        maxAttempts = 10 * swapsPerSample + 100
+        randrange = self.random.randrange
+        coin = self.random.random
+
+        sample = 0
+        while numberOfGraphs is None or sample < numberOfGraphs:
+            swaps = 0
+            attempts = 0
+            while swaps < swapsPerSample and attempts < maxAttempts and numberOfEdges > 1:
+                attempts += 1
+                i = randrange(numberOfEdges)
+                j = randrange(numberOfEdges)
+                if i == j:
+                    continue
+                a, b = edges[i]
+                c, d = edges[j]
+                if not directed and coin() < 0.5:
+                    c, d = d, c
+                if a == d or c == b or (a, d) in edgeIndex or (c, b) in edgeIndex:
+                    continue
+                edgeIndex.discard((a, b))
+                edgeIndex.discard((c, d))
+                edgeIndex.add((a, d))
+                edgeIndex.add((c, b))
+                if not directed:
+                    edgeIndex.discard((b, a))
+                    edgeIndex.discard((d, c))
+                    edgeIndex.add((d, a))
+                    edgeIndex.add((b, c))
+                edges[i] = (a, d)
+                edges[j] = (c, b)
+                swaps += 1
+            sample += 1
+            yield Graph(edges, inputGraph.mappings, directed)
+
+    def generateErdosRenyi(self, numberOfVertices, numberOfEdges, directed=False):
+        """
+        Erdos-Renyi G(n, m): numberOfEdges distinct edges drawn uniformly among all the vertex pairs
+        :param numberOfVertices:int - number of vertices, labelled "0".."n-1"
+        :param numberOfEdges:int - number of edges, at most the number of vertex pairs
+        :param directed:boolean - whether the graph is directed
+        :return: Graph - the random graph (vertices without edges are left out, as in an edge list file)
+        """
+        pairs = numberOfVertices * (numberOfVertices - 1)
+        if not directed:
+            pairs //= 2
+        if numberOfEdges > pairs:
+            raise ValueError("a graph on %d vertices has at most %d edges" % (numberOfVertices, pairs))
+        labels = LabelMapping([str(vertex) for vertex in range(numberOfVertices)])
+        randomGraph = Graph(directed=directed, mappings=labels)
+        randrange = self.random.randrange
+        while randomGraph.getNumberofEdges() < numberOfEdges:
+            missing = numberOfEdges - randomGraph.getNumberofEdges()
+            randomGraph.addEdges([(randrange(numberOfVertices), randrange(numberOfVertices)) for _ in range(missing)])
+        return randomGraph
+
+    def generatePowerLaw(self, numberOfVertices, numberOfEdges, exponent=2.5, directed=False):
+        """
+        Chung-Lu graph: the weight of vertex i is (i + 1) ** (-1 / (exponent - 1)), so the expected degrees follow a
+        power law with the given exponent, and the end points of every edge are drawn in proportion to the weights
+        (self loops and multi-edges are redrawn)
+        :param numberOfVertices:int - number of vertices, labelled "0".."n-1"
+        :param numberOfEdges:int - number of edges
+        :param exponent:float - exponent of the degree distribution, more than 2
+        :param directed:boolean - whether the graph is directed
+        :return: Graph - the random graph (vertices without edges are left out, as in an edge list file)
+        """
+        pairs = numberOfVertices * (numberOfVertices - 1)
+        if not directed:
+            pairs //= 2
+        if numberOfEdges > pairs // 2:
+            raise ValueError("too many edges for a sparse graph on %d vertices" % numberOfVertices)
+        weights = list(accumulate((vertex + 1) ** (-1 / (exponent - 1)) for vertex in range(numberOfVertices)))
+        labels = LabelMapping([str(vertex) for vertex in range(numberOfVertices)])
+        randomGraph = Graph(directed=directed, mappings=labels)
+        choices = self.random.choices
+        vertices = range(numberOfVertices)
+        while randomGraph.getNumberofEdges() < numberOfEdges:
+            missing = numberOfEdges - randomGraph.getNumberofEdges()
+            randomGraph.addEdges(zip(choices(vertices, cum_weights=weights, k=missing),
+                                     choices(vertices, cum_weights=weights, k=missing)))
+        return randomGraph
@@ -0,0 +1,234 @@
+from array import array
+import os
+import struct
+import sys
+
+
+class ResultSink:
+    """
+    A Class to receive the graphlets (complete mappings of the query graph) found by a search.
+    Every graphlet is given as the list of input vertices the query vertices are mapped to, in matching order.
+    Sinks buffer the graphlets and write them bufferSize at a time.
+
+    Methods
+    -------
+    open: start receiving graphlets
+
+    add: receive one graphlet
+
+    close: flush and stop receiving graphlets
+
+    forShard: the sink a worker process of the parallel search writes to
+
+    getResult, merge: bring the graphlets of a worker sink back into this one
+    """
+
+    bufferSize = 4096
+
+    def open(self, offset=None):
+        """
+        :param offset: getOffset of an earlier run to continue from (what it received after that is dropped),
+            None to start anew
+        """
+        pass
+
+    def getOffset(self):
+        """
+        :return: the position to continue from after everything received so far (see open), None if the sink can't
+            continue an earlier run
+        """
+        return None
+
+    def add(self, images, mappings):
+        """
+        :param images:List[int] - the input vertex of every query vertex, in matching order
+        :param mappings: the labels of the input vertices (see GraphProcessor)
+        """
+        pass
+
+    def close(self):
+        pass
+
+    def forShard(self, index):
+        """
+        :param index:int - number of the worker
+        :return: ResultSink - a sink for the graphlets of that worker
+        """
+        return self
+
+    def getResult(self):
+        """
+        :return: what merge needs from a worker sink once it is closed
+        """
+        return None
+
+    def merge(self, result):
+        """
+        :param result: getResult of a closed worker sink
+        """
+        pass
+
+
+class NullSink(ResultSink):
+    """
+    A sink that drops the graphlets, only counts are wanted
+    """
+
+
+class MemorySink(ResultSink):
+    """
+    A sink that keeps the graphlets in memory as one flat array of input vertex IDs
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.images = array("q")
+
+    def add(self, images, mappings):
+        self.size = len(images)
+        self.images.extend(images)
+
+    def forShard(self, index):
+        return MemorySink()
+
+    def getResult(self):
+        return self.size, self.images
+
+    def merge(self, result):
+        size, images = result
+        if images:
+            self.size = size
+            self.images.extend(images)
+
+    def getMatches(self):
+        """
+        :return: List[tuple] - every graphlet as a tuple of input vertex IDs, in matching order
+        """
+        size = self.size
+        return [tuple(self.images[i:i + size]) for i in range(0, len(self.images), size)] if size else []
+
+
+class TextSink(ResultSink):
+    """
+    A sink that writes every graphlet as str() of the list of its vertex labels, one per line (the original output
+    format of Utility)
+    """
+
+    def __init__(self, fileName, shardName=None):
+        """
+        Constructor
+        :param fileName:string - the output file
+        :param shardName:string - pattern of the output file of worker %d, defaults to fileName with _%d before the
+            extension
+        """
+        self.fileName = fileName
+        if shardName is None:
+            root, extension = os.path.splitext(fileName)
+            shardName = root.replace("%", "%%") + "_%d" + extension.replace("%", "%%")
+        self.shardName = shardName
+        self.file = None
+        self.buffer = []
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["file"] = None
+        return state
+
+    fileMode = ""
+
+    def open(self, offset=None):
+        if offset is None:
+            self.file = open(self.fileName, "w" + self.fileMode)
+        else:
+            os.truncate(self.fileName, offset)
+            self.file = open(self.fileName, "a" + self.fileMode)
+
+    def getOffset(self):
+        self.flush()
+        self.file.flush()
+        return self.file.tell()
+
+    def format(self, images, mappings):
+        return str([mappings[i] for i in images])
+
+    def add(self, images, mappings):
+        self.buffer.append(self.format(images, mappings))
+        if len(self.buffer) >= self.bufferSize:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.buffer.append("")
+            self.file.write("\n".join(self.buffer))
+            self.buffer = []
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def forShard(self, index):
+        return type(self)(self.shardName % index)
+
+
+class TSVSink(TextSink):
+    """
+    A sink that writes the vertex labels of every graphlet separated by tabs, one graphlet per line
+    """
+
+    def format(self, images, mappings):
+        return "\t".join([str(mappings[i]) for i in images])
+
+
+class BinarySink(TextSink):
+    """
+    A sink that writes the input vertex IDs of the graphlets as native int64 values after a header holding the
+    number of vertices per graphlet, read back with BinarySink.read
+    """
+
+    fileMagic = b"NEMOMAT1"
+    "magic, byte order, vertices per graphlet"
+    fileHeader = struct.Struct("<8s8sq")
+
+    fileMode = "b"
+
+    def open(self, offset=None):
+        TextSink.open(self, offset)
+        self.size = None
+        self.buffer = array("q")
+        if offset:
+            "the header of the earlier run is kept"
+            with open(self.fileName, "rb") as matchFile:
+                self.size = self.fileHeader.unpack(matchFile.read(self.fileHeader.size))[2]
+
+    def add(self, images, mappings):
+        if self.size is None:
+            self.size = len(images)
+            self.file.write(self.fileHeader.pack(self.fileMagic, sys.byteorder.encode(), self.size))
+        self.buffer.extend(images)
+        if len(self.buffer) >= self.bufferSize * self.size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.buffer.tofile(self.file)
+            self.buffer = array("q")
+
+    @classmethod
+    def read(cls, fileName):
+        """
+        :param fileName:string - a file written by a BinarySink
+        :return: (int, array) - vertices per graphlet and the flat array of the input vertex IDs of all graphlets
+        """
+        with open(fileName, "rb") as matchFile:
+            header = matchFile.read(cls.fileHeader.size)
+            images = array("q", matchFile.read())
+        if not header:
+            return 0, images
+        magic, byteOrder, size = cls.fileHeader.unpack(header)
+        if magic != cls.fileMagic:
+            raise ValueError("%s is not a graphlet file" % fileName)
+        if byteOrder.rstrip(b"\0").decode() != sys.byteorder:
+            images.byteswap()
+        return size, images
@@ -0,0 +1,276 @@
+from CompactGraph import CompactGraph
+from Graph import Graph
+from bisect import bisect_left, bisect_right
+
+
+class SearchEngine:
+    """
+    A Class to count the isomorphic extensions of a query plan with an iterative backtracking search.
+    The search gives the same counts as Utility.isomorphicExtensionWithPlan but keeps its whole state in
+    fixed-size arrays allocated once (the mapping, a used-vertex marker and one neighbor cursor per query vertex),
+    so no dict or list is built per search node and the depth is not limited by the recursion limit.
+    Candidates are the sorted intersection of the neighborhoods of the images that must be adjacent: the
+    smallest neighborhood is walked and every candidate is binary searched in the others, unless all of them
+    are hubs (at least hubDegree neighbors), then their bitsets are ANDed. The walked neighborhood is not searched
+    again, and the symmetry-breaking bounds cut the sorted candidates down by bisect before any of them is looked at.
+
+    Methods
+    -------
+    countRoot: count the isomorphic extensions of the root mapped to one input vertex
+
+    iterateRoot: generate the isomorphic extensions of the root mapped to one input vertex
+
+    count: count the isomorphic extensions of a list of roots
+    """
+
+    hubDegree = 512
+
+    def __init__(self, queryGraph, inputGraph, plan, utility, hubDegree=None, hubMasks=None, domains=None):
+        """
+        Constructor
+        :param queryGraph:Graph - reference to the query graph
+        :param inputGraph:Graph or CompactGraph - reference to the target graph, a Graph is converted to a CompactGraph
+        :param plan:QueryPlan - the matching plan (see Utility.createQueryPlan)
+        :param utility:Utility - the sink of the graphlets (utility.output, see ResultSink, written when
+            utility.random is not set) and the SearchStats to update (utility.stats, None to collect none)
+        :param hubDegree:int - degree from which the neighborhood of an input vertex is also kept as a bitset
+        :param hubMasks:Dict[int, int] - bitsets of hub neighborhoods to share with other engines on the same input
+        :param domains:List[Set[int]] - the candidate domain of every step of the plan (see
+            Utility.getPlanDomains), defaults to utility.domains
+        """
+        if not isinstance(inputGraph, CompactGraph):
+            inputGraph = CompactGraph.fromGraph(inputGraph)
+        self.queryGraph = queryGraph
+        self.inputGraph = inputGraph
+        self.plan = plan
+        self.utility = utility
+        if hubDegree is not None:
+            self.hubDegree = hubDegree
+        self.hubMasks = {} if hubMasks is None else hubMasks
+        self.stats = getattr(utility, "stats", None)
+        self.domains = getattr(utility, "domains", None) if domains is None else domains
+        size = max(plan.size, 1)
+        self.images = [0] * size
+        self.sequence = [None] * size
+        self.fromMask = [False] * size
+        self.start = [0] * size
+        self.cursor = [0] * size
+        self.stop = [0] * size
+        self.walked = [-1] * size
+        self.used = bytearray(len(inputGraph.offsets))
+
+    def count(self, roots):
+        """
+        :param roots:List[int] - the input vertices the root of the plan is mapped to
+        :return: int - the count of all the isomorphic extensions of all the roots
+        """
+        return sum(self.countRoot(root) for root in roots)
+
+    def countRoot(self, root):
+        """
+        :param root:int - the input vertex the root of the plan is mapped to
+        :return: int - the count of all the isomorphic extensions of the root, written to utility.output when
+            utility.random is not set
+        """
+        utility = self.utility
+        count = 0
+        if not utility.random and utility.output is not None:
+            output = utility.output
+            mappings = self.inputGraph.mappings
+            for images in self.iterateRoot(root):
+                output.add(images, mappings)
+                count += 1
+        else:
+            for _ in self.iterateRoot(root):
+                count += 1
+        return count
+
+    def iterateRoot(self, root):
+        """
+        Generator of the isomorphic extensions of the root, found one at a time
+        :param root:int - the input vertex the root of the plan is mapped to
+        :return: Iterator[List[int]] - the input vertex of every query vertex, in the order of plan.order (the same
+            list is updated in place and yielded again for every extension, copy it to keep it)
+        """
+        plan = self.plan
+        size = plan.size
+        if size == 0:
+            return
+        images = self.images
+        images[0] = root
+        if size == 1:
+            yield images
+            return
+
+        offsets = self.inputGraph.offsets
+        neighbors = self.inputGraph.neighbors
+        used = self.used
+        sequence = self.sequence
+        fromMask = self.fromMask
+        start = self.start
+        cursor = self.cursor
+        stop = self.stop
+        walked = self.walked
+        adjacent = plan.adjacent
+        nonAdjacent = plan.nonAdjacent
+        arcs = plan.arcs
+        directed = plan.directed
+        outOffsets = self.inputGraph.outOffsets
+        outNeighbors = self.inputGraph.outNeighbors
+        inOffsets = self.inputGraph.inOffsets
+        inNeighbors = self.inputGraph.inNeighbors
+        domains = self.domains or [None] * size
+        last = size - 1
+        nodes = pruned = None
+        if self.stats is not None:
+            self.stats.ensureDepth(size)
+            nodes = self.stats.nodes
+            pruned = self.stats.pruned
+
+        used[root] = 1
+        depth = 1
+        sequence[1] = neighbors
+        fromMask[1] = False
+        walked[1] = 0
+        start[1] = cursor[1] = offsets[root]
+        stop[1] = offsets[root + 1]
+        self.applyBounds(1)
+        while depth > 0:
+            position = cursor[depth]
+            if position == stop[depth]:
+                depth -= 1
+                used[images[depth]] = 0
+                continue
+            candidates = sequence[depth]
+            n = candidates[position]
+            cursor[depth] = position + 1
+            if used[n]:
+                if pruned is not None:
+                    pruned["used"][depth] += 1
+                continue
+            if position > start[depth] and candidates[position - 1] == n:
+                if pruned is not None:
+                    pruned["duplicate"][depth] += 1
+                continue
+
+            rejected = None
+            domain = domains[depth]
+            if domain is not None and n not in domain:
+                rejected = "domain"
+            if rejected is None and not fromMask[depth]:
+                "the candidates are neighbors of the walked image already"
+                for j in adjacent[depth]:
+                    if j == walked[depth]:
+                        continue
+                    mapped = images[j]
+                    end = offsets[mapped + 1]
+                    position = bisect_left(neighbors, n, offsets[mapped], end)
+                    if position == end or neighbors[position] != n:
+                        rejected = "adjacency"
+                        break
+            if rejected is None:
+                for j in nonAdjacent[depth]:
+                    mapped = images[j]
+                    end = offsets[mapped + 1]
+                    position = bisect_left(neighbors, n, offsets[mapped], end)
+                    if position != end and neighbors[position] == n:
+                        rejected = "nonAdjacency"
+                        break
+            if rejected is None and directed:
+                "n -> image of j is an in edge of the image, image of j -> n an out edge"
+                for j, arcOut, arcIn in arcs[depth]:
+                    mapped = images[j]
+                    end = inOffsets[mapped + 1]
+                    position = bisect_left(inNeighbors, n, inOffsets[mapped], end)
+                    if (position != end and inNeighbors[position] == n) != arcOut:
+                        rejected = "direction"
+                        break
+                    end = outOffsets[mapped + 1]
+                    position = bisect_left(outNeighbors, n, outOffsets[mapped], end)
+                    if (position != end and outNeighbors[position] == n) != arcIn:
+                        rejected = "direction"
+                        break
+            if rejected is not None:
+                if pruned is not None:
+                    pruned[rejected][depth] += 1
+                continue
+            if nodes is not None:
+                nodes[depth] += 1
+
+            images[depth] = n
+            if depth == last:
+                try:
+                    yield images
+                except GeneratorExit:
+                    "the caller stopped early: release the vertices still marked as used"
+                    for j in range(depth):
+                        used[images[j]] = 0
+                    raise
+                continue
+            used[n] = 1
+            depth += 1
+            "walk the smallest neighborhood of the images that must be adjacent, the others are galloped by bisect"
+            smallest = -1
+            smallestSize = -1
+            for j in adjacent[depth]:
+                mapped = images[j]
+                degree = offsets[mapped + 1] - offsets[mapped]
+                if smallest < 0 or degree < smallestSize:
+                    smallest = mapped
+                    smallestSize = degree
+                    walked[depth] = j
+            if smallestSize >= self.hubDegree and len(adjacent[depth]) > 1:
+                "all of them are hubs: intersect their bitsets instead"
+                mask = -1
+                for j in adjacent[depth]:
+                    mask &= self.getHubMask(images[j])
+                for j in nonAdjacent[depth]:
+                    mapped = images[j]
+                    if offsets[mapped + 1] - offsets[mapped] >= self.hubDegree:
+                        mask &= ~self.getHubMask(mapped)
+                candidates = Graph.maskToVertices(mask)
+                sequence[depth] = candidates
+                fromMask[depth] = True
+                start[depth] = cursor[depth] = 0
+                stop[depth] = len(candidates)
+            else:
+                sequence[depth] = neighbors
+                fromMask[depth] = False
+                start[depth] = cursor[depth] = offsets[smallest]
+                stop[depth] = offsets[smallest + 1]
+            self.applyBounds(depth)
+
+    def applyBounds(self, depth):
+        """
+        Narrow the candidates of a depth to the symmetry-breaking bounds: they are sorted, so the candidates below the
+        largest lower bound and above the smallest upper bound are skipped by bisect instead of checked one by one
+        :param depth:int - the depth whose sequence, cursor and stop were just set
+        """
+        images = self.images
+        candidates = self.sequence[depth]
+        position, stop = self.cursor[depth], self.stop[depth]
+        lower = upper = None
+        for j in self.plan.lowerBounds[depth]:
+            if lower is None or images[j] > lower:
+                lower = images[j]
+        for j in self.plan.upperBounds[depth]:
+            if upper is None or images[j] < upper:
+                upper = images[j]
+        first = position if lower is None else bisect_left(candidates, lower, position, stop)
+        last = stop if upper is None else bisect_right(candidates, upper, first, stop)
+        if self.stats is not None:
+            self.stats.pruned["symmetry"][depth] += first - position + stop - last
+        self.cursor[depth] = first
+        self.stop[depth] = last
+
+    def getHubMask(self, vertex):
+        """
+        :param vertex:int - a vertex with at least hubDegree neighbors
+        :return: int - bitset of the neighbors of vertex (built on first use)
+        """
+        mask = self.hubMasks.get(vertex)
+        if mask is None:
+            mask = Graph.verticesToMask(self.inputGraph.neighbors[self.inputGraph.offsets[vertex]:
+                                                                  self.inputGraph.offsets[vertex + 1]])
+            self.hubMasks[vertex] = mask
+        return mask
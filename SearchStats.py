@@ -0,0 +1,110 @@
+import json
+
+
+class SearchStats:
+    """
+    A Class to collect statistics of a search (opt-in: pass one to Utility.algorithm2_modified).
+    Depth d is the d-th query vertex of the matching order, depth 0 is the root.
+
+    Attributes
+    ----------
+    nodes:List[int] - for every depth, the partial mappings extended to it (search tree nodes visited)
+    pruned:Dict[str, List[int]] - for every filter, the candidates it rejected at every depth:
+        used (already the image of another query vertex), duplicate (repeated candidate), domain (not in the candidate
+        domain of the query vertex, see CandidateDomains), symmetry (symmetry-breaking condition), adjacency (an edge
+        of the query graph is missing), nonAdjacency (an edge that the query graph doesn't have is present) and
+        direction (an edge has the wrong direction). The iterative SearchEngine skips the candidates outside the
+        symmetry-breaking bounds before any other filter, so its symmetry counts are higher (and the others lower)
+    rootSeconds:Dict[int, float] - wall time of every root vertex
+    rootCounts:Dict[int, int] - count of every root vertex
+
+    Methods
+    -------
+    getCandidates: candidates generated at every depth
+
+    getSlowestRoots: the root vertices that took the longest
+
+    merge: add the statistics of another search (e.g. of a worker process)
+
+    toDict, toJSON: the report
+    """
+
+    filters = ("used", "duplicate", "domain", "symmetry", "adjacency", "nonAdjacency", "direction")
+
+    def __init__(self):
+        self.nodes = []
+        self.pruned = {name: [] for name in self.filters}
+        self.rootSeconds = {}
+        self.rootCounts = {}
+
+    def ensureDepth(self, depth):
+        """
+        Make room for the counters of depths 0..depth-1
+        :param depth:int - number of depths
+        """
+        for counters in [self.nodes] + list(self.pruned.values()):
+            if len(counters) < depth:
+                counters.extend([0] * (depth - len(counters)))
+
+    def addRoot(self, root, count, seconds):
+        """
+        :param root:int - a root vertex
+        :param count:int - its count
+        :param seconds:float - its wall time
+        """
+        self.rootCounts[root] = self.rootCounts.get(root, 0) + count
+        self.rootSeconds[root] = self.rootSeconds.get(root, 0.0) + seconds
+
+    def getCandidates(self):
+        """
+        :return: List[int] - for every depth, the candidates generated (extended or rejected by a filter)
+        """
+        return [self.nodes[depth] + sum(counters[depth] for counters in self.pruned.values())
+                for depth in range(len(self.nodes))]
+
+    def getSlowestRoots(self, number=10):
+        """
+        :param number:int - number of roots
+        :return: List[(int, float, int)] - the slowest root vertices with their wall time and count, slowest first
+        """
+        roots = sorted(self.rootSeconds, key=self.rootSeconds.get, reverse=True)[:number]
+        return [(root, self.rootSeconds[root], self.rootCounts.get(root, 0)) for root in roots]
+
+    def merge(self, other):
+        """
+        :param other:SearchStats - statistics to add to these
+        """
+        self.ensureDepth(len(other.nodes))
+        for depth, nodes in enumerate(other.nodes):
+            self.nodes[depth] += nodes
+        for name, counters in other.pruned.items():
+            for depth, pruned in enumerate(counters):
+                self.pruned[name][depth] += pruned
+        for root, seconds in other.rootSeconds.items():
+            self.addRoot(root, other.rootCounts.get(root, 0), seconds)
+
+    def toDict(self, slowestRoots=10):
+        """
+        :param slowestRoots:int - number of the slowest root vertices to list
+        :return: Dict[str, object] - roots, seconds, nodes, candidates and pruned (per depth), the slowest roots,
+            and the wall time and count of every root
+        """
+        return {
+            "roots": len(self.rootSeconds),
+            "seconds": sum(self.rootSeconds.values()),
+            "nodes": list(self.nodes),
+            "candidates": self.getCandidates(),
+            "pruned": {name: list(counters) for name, counters in self.pruned.items()},
+            "slowestRoots": [{"root": root, "seconds": seconds, "count": count}
+                             for root, seconds, count in self.getSlowestRoots(slowestRoots)],
+            "rootSeconds": {str(root): seconds for root, seconds in self.rootSeconds.items()},
+            "rootCounts": {str(root): count for root, count in self.rootCounts.items()},
+        }
+
+    def toJSON(self, indent=None, slowestRoots=10):
+        """
+        :param indent:int - indentation of the JSON text, None for one line
+        :param slowestRoots:int - see toDict
+        :return: str - toDict as JSON
+        """
+        return json.dumps(self.toDict(slowestRoots), indent=indent)
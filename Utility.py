@@ -1,7 +1,72 @@
+from AutomorphismGroup import AutomorphismGroup
+from CandidateDomains import CandidateDomains
+from CompactGraph import CompactGraph
 from Graph import Graph
+from QueryPlan import QueryPlan
+from ResultSink import TextSink
+from ConditionCache import ConditionCache
+from SearchEngine import SearchEngine
+from SearchStats import SearchStats
+from array import array
 from collections import defaultdict
 from bisect import bisect_left
-from random import randrange
+from random import Random, sample
+from statistics import NormalDist
+from heapq import heappush, heappop
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import hashlib
+import json
+import os
+
+
+_workerSearch = {}
+
+
+def _initWorker(queryGraph, inputGraph, plan, isRandomGraph, engine, collectStats, domains):
+    """
+    Process pool initializer of the parallel mode of Utility.algorithm2_modified: keep the search in the worker, so
+    the graphs are pickled once per worker, not once per task
+    :param queryGraph:Graph - the query graph
+    :param inputGraph:Graph - the input graph
+    :param plan:QueryPlan - the matching plan of the query graph
+    :param isRandomGraph: see Utility.algorithm2_modified
+    :param engine:str - the search engine (see Utility.countRoots)
+    :param collectStats:boolean - collect SearchStats
+    :param domains:List[Set[int]] - the candidate domains (see Utility.getPlanDomains), or None
+    """
+    if engine == "iterative" and not isinstance(inputGraph, CompactGraph):
+        "converted once here rather than by every SearchEngine"
+        inputGraph = CompactGraph.fromGraph(inputGraph)
+    _workerSearch.update(queryGraph=queryGraph, inputGraph=inputGraph, plan=plan, isRandomGraph=isRandomGraph,
+                         engine=engine, collectStats=collectStats, domains=domains)
+
+
+def _countRoots(task):
+    """
+    Worker of the parallel mode of Utility.algorithm2_modified: count the isomorphic extensions of a share of the roots
+    :param task:(List[int], ResultSink, object) - the roots, this worker's result sink (or None) and the offset to
+        open it at (see ResultSink.open, None to start it anew)
+    :return: (List[int], object, object, SearchStats) - the count of every root, in the order of the roots, the
+        result of the sink, its offset after the share (see ResultSink.getOffset) and the statistics (or None)
+    """
+    roots, sink, offset = task
+    utility = Utility()
+    utility.random = _workerSearch["isRandomGraph"]
+    utility.domains = _workerSearch["domains"]
+    if _workerSearch["collectStats"]:
+        utility.stats = SearchStats()
+    if not utility.random and sink is not None:
+        utility.output = sink
+        sink.open(offset)
+    counts = utility.countRoots(_workerSearch["queryGraph"], _workerSearch["inputGraph"], _workerSearch["plan"], roots,
+                                _workerSearch["engine"])
+    result = offset = None
+    if utility.output is not None:
+        offset = utility.output.getOffset()
+        utility.output.close()
+        result = utility.output.getResult()
+    return counts, result, offset, utility.stats
 
 
 # noinspection PyPep8Naming
@@ -19,6 +84,18 @@ class Utility:
 
     isomorphicExtension
 
+    createQueryPlan
+
+    getMatchingOrder
+
+    getConditions
+
+    isomorphicExtensionWithPlan
+
+    iterateMatches
+
+    estimateCount
+
     equalDtoH
 
     getMostConstrainedNeightbor
@@ -26,11 +103,24 @@ class Utility:
     chooseNeighboursOfRange
 
     isNeighborIncompatible
+
+    partitionRoots
     """
 
+    "symmetry-breaking conditions and matching orders by canonical query form, shared by every Utility of a process"
+    conditionCache = ConditionCache()
+    outputFileName = "static/output.txt"
+    hashIntersectionSize = 256
+    outputShardName = "static/output_%d.txt"
+    checkpointInterval = 60.0
+    progressInterval = 1.0
+    checkpointBatches = 100
+
     def __init__(self):
         self.random = None
         self.output = None
+        self.stats = None
+        self.domains = None
         pass
 
     def binarySearch(self, a, x, lo=0, hi=None):
@@ -38,6 +128,64 @@ class Utility:
         pos = bisect_left(a, x, lo, hi)  # find insertion position
         return pos if pos != hi and a[pos] == x else -1
 
+    def intersectSorted(self, a, b):
+        """
+        Method to intersect two sorted lists of vertices.
+        A small list is galloped through a much larger one (binary search from the last match on), two large lists
+        are intersected with hashing, otherwise the lists are merged
+        :param a:List[int] - sorted list
+        :param b:List[int] - sorted list
+        :return: List[int] - sorted list of the vertices in both a and b (no duplicates)
+        """
+        if len(a) > len(b):
+            a, b = b, a
+        result = []
+        if not a:
+            return result
+        sizeA = len(a)
+        sizeB = len(b)
+        if sizeA * 8 < sizeB:
+            lo = 0
+            for x in a:
+                lo = bisect_left(b, x, lo, sizeB)
+                if lo == sizeB:
+                    break
+                if b[lo] == x and (not result or result[-1] != x):
+                    result.append(x)
+        elif sizeA > self.hashIntersectionSize:
+            result = sorted(set(a).intersection(b))
+        else:
+            i = j = 0
+            while i < sizeA and j < sizeB:
+                x = a[i]
+                y = b[j]
+                if x < y:
+                    i += 1
+                elif y < x:
+                    j += 1
+                else:
+                    if not result or result[-1] != x:
+                        result.append(x)
+                    i += 1
+                    j += 1
+        return result
+
+    def subtractSorted(self, a, b):
+        """
+        Method to remove the vertices of a sorted list from another sorted list, galloping through b
+        :param a:List[int] - sorted list
+        :param b:List[int] - sorted list of the vertices to remove
+        :return: List[int] - sorted list of the vertices of a that are not in b
+        """
+        result = []
+        lo = 0
+        sizeB = len(b)
+        for x in a:
+            lo = bisect_left(b, x, lo, sizeB)
+            if lo == sizeB or b[lo] != x:
+                result.append(x)
+        return result
+
     def getMostConstrainedNeighbour(self, partialMap, queryGraph):
         """
         Method to find the most constrained neighboring node of mapped nodes in the query graph.
@@ -58,10 +206,9 @@ class Utility:
 
         "2D list to create pairs"
         constrainRank = [[0, neighborList[i]] for i in range(len(neighborList))]
+        mappedMask = Graph.verticesToMask(partialMap)
         for i in range(0, len(neighborList)):
-            for vertex in queryGraph.getNeighbors(constrainRank[i][1]):
-                if vertex in partialMap:
-                    constrainRank[i][0] += 1
+            constrainRank[i][0] = bin(queryGraph.getNeighborMask(constrainRank[i][1]) & mappedMask).count("1")
         "Rank neighbor nodes with most already-mapped neighbors"
         constrainRank.sort(reverse=True)
 
@@ -102,12 +249,11 @@ class Utility:
             :param   neightborList:List[int[ - the reference to the return list of neighbors
             :return: List[int] - modified neighborList
         """
+        neighborMask = 0
         for node in targetNodes:
-            neighbors = inputGraph.getNeighbors(node)
-            for neighbor in neighbors:
-                if neighbor not in targetNodes:
-                    neightborList.append(neighbor)
-        neightborList[:] = sorted(list(set(neightborList)))
+            neighborMask |= inputGraph.getNeighborMask(node)
+        neighborMask &= ~Graph.verticesToMask(targetNodes)
+        neightborList[:] = sorted(set(neightborList).union(Graph.maskToVertices(neighborMask)))
         return neightborList
 
     def isNeighborIncompatible(self, inputGraph, n, partialMap, neighborsOfM):
@@ -119,13 +265,14 @@ class Utility:
         :param neighborsOfM:List[int] - the list of neighbors of node m to the query graph
         :return: boolean - True if node n can be mapped to node m, otherwise false
         """
+        maskOfM = Graph.verticesToMask(neighborsOfM)
         for node in partialMap:
             neighborsOfNode = inputGraph.getNeighbors(partialMap[node])
-            if node in neighborsOfM:
-                if n not in neighborsOfNode:
+            if maskOfM >> node & 1:
+                if self.binarySearch(neighborsOfNode, n) < 0:
                     return True
             else:
-                if n in neighborsOfNode:
+                if self.binarySearch(neighborsOfNode, n) >= 0:
                     return True
         return False
 
@@ -178,6 +325,15 @@ class Utility:
         newGraph = self.createIsomorphicGraphs(inputGraph, vertexList)
         return sorted(queryGraph.getFromToCount()) == sorted(newGraph.getFromToCount())
 
+    def isDirectionPreserving(self, partialMap, queryGraph):
+        """
+        :param partialMap:Dict[int, int] - a complete mapping of the query graph to itself
+        :param queryGraph:Graph - the (directed) query graph
+        :return: boolean - True if every edge a -> b is mapped to an edge f(a) -> f(b)
+        """
+        return all(queryGraph.hasArc(partialMap[source], partialMap[target])
+                   for source, target in queryGraph.getEdgeList())
+
     def findCondition(self, mappedHNodes, theMappings, condition, equivalenceClass):
         """
         Method to find the symmetry-breaking conditions by Grochow-Kellis.
@@ -261,31 +417,23 @@ class Utility:
         if m < 0:
             return 0
         neighborsOfM = queryGraph.getNeighbors(m)
+        maskOfM = queryGraph.getNeighborMask(m)
         bestMappedNeighborOfM = 0
         for neighbor in neighborsOfM:
             if neighbor in partialMap.keys():
                 bestMappedNeighborOfM = neighbor
                 break
 
-        possibleMappingNodes = []
-        for node in inputGraph.getNeighbors(partialMap[bestMappedNeighborOfM]):
-            if node not in partialMapValuesG:
-                possibleMappingNodes.append(int(node))
+        possibleMappingNodes = self.subtractSorted(inputGraph.getNeighbors(partialMap[bestMappedNeighborOfM]),
+                                                   partialMapValuesG)
 
         partialMapKeysHSize = len(partialMapKeysH)
         for i in range(0, partialMapKeysHSize):
             neighborsOfMappedGNode = (inputGraph.getNeighbors(mapValueOriginal[i]))
-            temp = []
-            if int(mapKeyOriginal[i]) in neighborsOfM:
-                for node in possibleMappingNodes:
-                    if node in neighborsOfMappedGNode:
-                        temp.append(int(node))
-                possibleMappingNodes = temp.copy()
+            if maskOfM >> int(mapKeyOriginal[i]) & 1:
+                possibleMappingNodes = self.intersectSorted(possibleMappingNodes, neighborsOfMappedGNode)
             else:
-                for node in possibleMappingNodes:
-                    if node not in neighborsOfMappedGNode:
-                        temp.append(int(node))
-                possibleMappingNodes = temp.copy()
+                possibleMappingNodes = self.subtractSorted(possibleMappingNodes, neighborsOfMappedGNode)
 
         for n in possibleMappingNodes:
             if not self.isNeighborIncompatible(inputGraph, n, partialMap, neighborsOfM):
@@ -306,15 +454,11 @@ class Utility:
                         if not self.random and self.output is not None:
                             if inputGraph.getDirected():
                                 if self.isIsomorphicGraphSimilar(newPartialMap.values(), inputGraph, queryGraph):
-                                    graphlet = [inputGraph.mappings[i] for i in newPartialMap.values()]
-                                    self.output.write(str(graphlet))
-                                    self.output.write("\n")
+                                    self.output.add(list(newPartialMap.values()), inputGraph.mappings)
                                 else:
                                     subList = 0
                             else:
-                                graphlet = [inputGraph.mappings[i] for i in newPartialMap.values()]
-                                self.output.write(str(graphlet))
-                                self.output.write("\n")
+                                self.output.add(list(newPartialMap.values()), inputGraph.mappings)
                         else:
                             if inputGraph.getDirected():
                                 if not self.isIsomorphicGraphSimilar(newPartialMap.values(), inputGraph, queryGraph):
@@ -324,13 +468,120 @@ class Utility:
 
         return listOfIsomorphisms
 
-    def isomorphicExtensionForEquivalenceClass(self, partialMap, queryGraph, inputGraph, mappedHNodes):
+    def createQueryPlan(self, queryGraph, h, symBreakCondition, directed=False):
+        """
+        Method to compile the matching plan of the query graph for root h: the order in which
+        getMostConstrainedNeighbour picks the query vertices (looked up in conditionCache), and for every step the
+        adjacency and symmetry-breaking checks
+        :param queryGraph:Graph - reference to the query graph
+        :param h:int - the starting node h of query graph
+        :param symBreakCondition:Dict[int, List[int] - set of symmetry-breaking conditions (computed with
+            respectDirection when directed is set)
+        :param directed:boolean - also match the direction of every edge at every step
+        :return: QueryPlan - the plan
+        """
+        order = self.conditionCache.getOrder(queryGraph, h, directed, lambda: self.getMatchingOrder(queryGraph, h))
+        return QueryPlan(queryGraph, order, symBreakCondition, directed)
+
+    def getMatchingOrder(self, queryGraph, h):
+        """
+        Method to find the order in which the recursive search maps the query vertices when it starts from h
+        :param queryGraph:Graph - reference to the query graph
+        :param h:int - the starting node h of query graph
+        :return: List[int] - the query vertices in matching order (incomplete if the query graph is not connected)
+        """
+        order = [h]
+        while len(order) < len(queryGraph.getVertexList()):
+            m = self.getMostConstrainedNeighbour(sorted(order), queryGraph)
+            if m < 0:
+                break
+            order.append(m)
+        return order
+
+    def getConditions(self, queryGraph, h, respectDirection=False):
+        """
+        Method to get the symmetry-breaking conditions of the query graph from conditionCache, computing them from the
+        orbits of its automorphism group (see AutomorphismGroup) only the first time a motif is seen
+        :param queryGraph:Graph - reference to query graph
+        :param h:int - the starting node h of query graph
+        :param respectDirection:boolean - break only the symmetries that also preserve edge directions
+        :return: Dict[int, List[int]] - a set of symmetry-breaking conditions
+        """
+        return self.conditionCache.getConditions(
+            queryGraph, respectDirection,
+            lambda: AutomorphismGroup(queryGraph, respectDirection).getConditions())
+
+    def isomorphicExtensionWithPlan(self, images, plan, queryGraph, inputGraph):
+        """
+        Method to count all of the isomorphic extensions (no duplicates) of a partial map, following a precompiled plan
+        :param images:List[int] - images of the first len(images) query vertices of plan.order (modified in place
+            during the search and restored before returning)
+        :param plan:QueryPlan - the matching plan (see createQueryPlan)
+        :param queryGraph:Graph - reference to the query graph
+        :param inputGraph:Graph - reference to the target graph
+        :return: int - representing the count of all the isomorphic extensions
+        """
+        depth = len(images)
+        if depth == plan.size:
+            if not self.random and self.output is not None:
+                self.output.add(images, inputGraph.mappings)
+            return 1
+        if plan.size == 0:
+            return 0
+
+        adjacentLists = sorted((inputGraph.getNeighbors(images[j]) for j in plan.adjacent[depth]), key=len)
+        candidates = adjacentLists[0]
+        for neighbors in adjacentLists[1:]:
+            candidates = self.intersectSorted(candidates, neighbors)
+        for j in plan.nonAdjacent[depth]:
+            candidates = self.subtractSorted(candidates, inputGraph.getNeighbors(images[j]))
+        lowerBound = max((images[j] for j in plan.lowerBounds[depth]), default=None)
+        upperBound = min((images[j] for j in plan.upperBounds[depth]), default=None)
+        domain = None if self.domains is None else self.domains[depth]
+
+        stats = self.stats
+        listOfIsomorphisms = 0
+        previous = None
+        for n in candidates:
+            if n == previous:
+                if stats is not None:
+                    stats.pruned["duplicate"][depth] += 1
+                continue
+            previous = n
+            if n in images:
+                if stats is not None:
+                    stats.pruned["used"][depth] += 1
+                continue
+            if domain is not None and n not in domain:
+                if stats is not None:
+                    stats.pruned["domain"][depth] += 1
+                continue
+            if lowerBound is not None and n < lowerBound or upperBound is not None and n > upperBound:
+                if stats is not None:
+                    stats.pruned["symmetry"][depth] += 1
+                continue
+            if plan.directed and not all(inputGraph.hasArc(n, images[j]) == arcOut and
+                                         inputGraph.hasArc(images[j], n) == arcIn
+                                         for j, arcOut, arcIn in plan.arcs[depth]):
+                if stats is not None:
+                    stats.pruned["direction"][depth] += 1
+                continue
+            if stats is not None:
+                stats.nodes[depth] += 1
+            images.append(n)
+            listOfIsomorphisms += self.isomorphicExtensionWithPlan(images, plan, queryGraph, inputGraph)
+            images.pop()
+        return listOfIsomorphisms
+
+    def isomorphicExtensionForEquivalenceClass(self, partialMap, queryGraph, inputGraph, mappedHNodes,
+                                               respectDirection=False):
         """
         Helper method to find all of the isomorphic extensions of a partial map between the query graph and itself
         :param partialMap:dict[int, int] - a partial map
         :param queryGraph:Graph
         :param inputGraph:Graph - same as query graph
         :param mappedHNodes:List[int] -
+        :param respectDirection:boolean - only keep the mappings that also preserve the direction of every edge
         :return: List[List[int]] -
         """
 
@@ -351,6 +602,8 @@ class Utility:
         partialMapKeysH.sort()
 
         if self.equalDtoH(queryGraph.getVertexList(), partialMapKeysH) == True:
+            if respectDirection and not self.isDirectionPreserving(partialMap, queryGraph):
+                return result
             mappedHNodes[:] = list(mapKeyOriginal)
             result.append(mapValueOriginal)
             return result
@@ -369,17 +622,19 @@ class Utility:
                 newPartialMap = partialMap.copy()
                 newPartialMap[m] = int(n)
                 subList = self.isomorphicExtensionForEquivalenceClass(newPartialMap, queryGraph, inputGraph,
-                                                                      mappedHNodes)
+                                                                      mappedHNodes, respectDirection)
                 for item in subList:
                     listOfIsomorphisms.append(item)
         return listOfIsomorphisms
 
-    def algorithm2_modified_for_equivalance_class(self, queryGraph, inputGraph, fixedNode):
+    def algorithm2_modified_for_equivalance_class(self, queryGraph, inputGraph, fixedNode, respectDirection=False):
         """
         Method to find the symmetry-breaking conditions by Grochow-Kellis. It starts by choosing one node to be the anchor point and create conditions from
         :param queryGraph:Graph - reference to query graph
         :param inputGraph:Graph - reference to input graph
         :param fixedNode:int - the node we choose to be fixed as the anchor for symmetry (might not be needed??)
+        :param respectDirection:boolean - break only the symmetries that also preserve edge directions (needed when
+            the search itself matches directions, see createQueryPlan)
         :return: Dict[int, List[int]] - a set of symmetry-breaking conditions for each represented node from each equivalance class
         """
         vertexList = queryGraph.getVertexList()
@@ -392,7 +647,8 @@ class Utility:
         for item in inputGraphDegSeq:
             f = {}  # dictionary of pairs
             f[h] = int(item)
-            mappings = self.isomorphicExtensionForEquivalenceClass(f, queryGraph, queryGraph, mappedHNodes)
+            mappings = self.isomorphicExtensionForEquivalenceClass(f, queryGraph, queryGraph, mappedHNodes,
+                                                                   respectDirection)
             for maps in mappings:
                 theMappings.append(maps)
 
@@ -401,7 +657,127 @@ class Utility:
 
         return self.findCondition(mappedHNodes, theMappings, condition, equivalenceClass)
 
-    def algorithm2_modified(self, queryGraph, inputGraph, h, isRandomGraph):
+    def partitionRoots(self, inputGraph, roots, numberOfParts):
+        """
+        Method to split the root vertices into balanced shares for the parallel mode of algorithm2_modified.
+        The cost of a root is estimated by the size of its two-hop neighborhood (sum of the degrees of its neighbors)
+        and the roots are dealt out most expensive first to the least loaded share, so hubs end up on different workers
+        :param inputGraph:Graph - reference to input graph
+        :param roots:List[int] - the root vertices
+        :param numberOfParts:int - number of shares
+        :return: List[List[int]] - the shares
+        """
+        def cost(vertex):
+            return self.estimateRootCost(inputGraph, vertex)
+
+        parts = [[] for _ in range(numberOfParts)]
+        loads = [(0, part) for part in range(numberOfParts)]
+        for rootCost, root in sorted(((cost(root), root) for root in roots), reverse=True):
+            load, part = heappop(loads)
+            parts[part].append(root)
+            heappush(loads, (load + rootCost, part))
+        return parts
+
+    def countRoots(self, queryGraph, inputGraph, plan, roots, engine="recursive"):
+        """
+        Method to count the isomorphic extensions of every root with the chosen search engine
+        :param queryGraph:Graph - reference to query graph
+        :param inputGraph:Graph - reference to input graph
+        :param plan:QueryPlan - the matching plan of the query graph
+        :param roots:List[int] - the vertices of the input graph the root of the plan is mapped to
+        :param engine:str - "recursive" (isomorphicExtensionWithPlan) or "iterative" (SearchEngine)
+        :return: List[int] - the count of every root, in the order of the roots (also recorded in self.stats, with
+            the wall time of every root, when it is set)
+        """
+        countRoot = self.getRootCounter(queryGraph, inputGraph, plan, engine)
+        return [countRoot(root) for root in roots]
+
+    def getRootCounter(self, queryGraph, inputGraph, plan, engine="recursive"):
+        """
+        Method to prepare the chosen search engine for counting roots one at a time
+        :param queryGraph:Graph - reference to query graph
+        :param inputGraph:Graph - reference to input graph
+        :param plan:QueryPlan - the matching plan of the query graph
+        :param engine:str - "recursive" (isomorphicExtensionWithPlan) or "iterative" (SearchEngine)
+        :return: Callable[[int], int] - counts the isomorphic extensions of a root (recorded in self.stats, with its
+            wall time, when it is set)
+        """
+        if engine == "iterative":
+            countRoot = SearchEngine(queryGraph, inputGraph, plan, self).countRoot
+        elif engine == "recursive":
+            def countRoot(root):
+                return self.isomorphicExtensionWithPlan([root], plan, queryGraph, inputGraph)
+        else:
+            raise ValueError("unknown search engine: %s" % engine)
+        stats = self.stats
+        if stats is None:
+            return countRoot
+        stats.ensureDepth(max(plan.size, 1))
+
+        def countRootWithStats(root):
+            start = perf_counter()
+            count = countRoot(root)
+            stats.addRoot(root, count, perf_counter() - start)
+            if plan.size:
+                stats.nodes[0] += 1
+            return count
+        return countRootWithStats
+
+    def iterateMatches(self, queryGraph, inputGraph, h, limit=None, filterDomains=False):
+        """
+        Generator of the graphlets of the query graph in the input graph (the mappings algorithm2_modified counts),
+        found lazily with the iterative SearchEngine
+        :param queryGraph:Graph - reference to query graph
+        :param inputGraph:Graph - reference to input graph
+        :param h:int - the starting node h of query graph
+        :param limit:int - stop after this many graphlets, None for all of them
+        :param filterDomains:boolean - prune with the candidate domains (see algorithm2_modified)
+        :return: Iterator[tuple] - every graphlet as the tuple of the input vertices of the query vertices, in
+            ascending order of the query vertex IDs
+        """
+        if limit is not None and limit <= 0:
+            return
+        directed = queryGraph.getDirected() and inputGraph.getDirected()
+        condition = self.getConditions(queryGraph, h, directed)
+        plan = self.createQueryPlan(queryGraph, h, condition, directed)
+        domains = self.getPlanDomains(queryGraph, inputGraph, plan, directed) if filterDomains else None
+        searchEngine = SearchEngine(queryGraph, inputGraph, plan, self, domains=domains)
+        positions = [plan.position[vertex] for vertex in sorted(plan.order)]
+        found = 0
+        for root in self.filterRoots(inputGraph.getNodesSortedByDegree(queryGraph.getOutDegree(h)), domains):
+            for images in searchEngine.iterateRoot(root):
+                yield tuple([images[position] for position in positions])
+                found += 1
+                if found == limit:
+                    return
+
+    def getPlanDomains(self, queryGraph, inputGraph, plan, directed=False):
+        """
+        Method to compute the candidate domains of the query vertices (see CandidateDomains) in the order of a plan
+        :param queryGraph:Graph - reference to query graph
+        :param inputGraph:Graph - reference to input graph
+        :param plan:QueryPlan - the matching plan of the query graph
+        :param directed:boolean - also filter by in and out degree
+        :return: List[Set[int]] - the domain of every step of the plan (None where nothing is pruned), None for a
+            disconnected query graph
+        """
+        if plan.size == 0:
+            return None
+        return CandidateDomains(queryGraph, inputGraph, directed).getPlanDomains(plan)
+
+    def filterRoots(self, roots, domains):
+        """
+        :param roots:List[int] - root vertices
+        :param domains:List[Set[int]] - see getPlanDomains, or None
+        :return: List[int] - the roots in the domain of the root of the plan, in the same order
+        """
+        if domains is None or domains[0] is None:
+            return roots
+        return [root for root in roots if root in domains[0]]
+
+    def algorithm2_modified(self, queryGraph, inputGraph, h, isRandomGraph, workers=1, engine="recursive",
+                            sink=None, mode="enumerate", k=None, stats=None, checkpoint=None, resume=False,
+                            progress=None, filterDomains=False, rng=None):
         """
         Method to use NemoMap algorithm (i.e. Algorithm 5 from the NemoMap paper)
             ***Modified from Grochow-Kelis algorithm***
@@ -413,12 +789,59 @@ class Utility:
         :param inputGraph:Graph - reference to input graph
         :param h:int - the starting node h of query graph -
             (should be the most constrained node of H -> first rank by out-degree; second rank by neighbor degree sequence)
-        :return: int - The count of all of possible mappings of the query graph to the target graph
+        :param workers:int - number of worker processes the root vertices are split across, 1 runs in this process.
+            Each worker writes its graphlets to its own shard (sink.forShard)
+        :param engine:str - "recursive" or "iterative" (an explicit stack over preallocated arrays, see SearchEngine),
+            both give the same counts
+        :param sink:ResultSink - where the graphlets go when isRandomGraph is not set, defaults to a TextSink
+            writing outputFileName (outputShardName for the workers)
+        :param mode:str - "enumerate" counts and outputs every graphlet, "count" only counts them (no labels are looked
+            up and nothing is written), "exists" stops at the first graphlet and "topk" at the k-th one
+            (see iterateMatches, these two search every root in this process with the iterative engine whatever
+            engine, isRandomGraph and rng are, and raise ValueError if workers, sink, stats, checkpoint, resume or
+            progress is set)
+        :param k:int - number of graphlets of the "topk" mode
+        :param stats:SearchStats - collects the search tree nodes, the candidates pruned by every filter and the wall
+            time of every root vertex (not collected by the "exists" and "topk" modes), None to collect nothing
+        :param checkpoint:string - file the completed roots, their counts and the output offset of the sink are saved
+            to every checkpointInterval seconds (see countRootsResumable)
+        :param resume:boolean - continue from checkpoint if it exists: its roots are not searched again and the
+            output of the sink is truncated to what it had received when the checkpoint was saved
+        :param progress:Callable[[Dict[str, float]], None] - called every progressInterval seconds and at the end
+            with done, total, count, elapsed, rootsPerSecond, matchesPerSecond and eta (seconds)
+        :param filterDomains:boolean - prune the roots and the candidates of every query vertex with its candidate
+            domain (see CandidateDomains), computed before the search: it pays off when many vertices of the input
+            graph can't be the image of some query vertex
+        :param rng:Random - the generator of the root sample of large random graphs, None for the one of the random
+            module
+        :return: int - The count of all of possible mappings of the query graph to the target graph,
+            for "exists" a boolean, for "topk" a list of at most k graphlets (see iterateMatches)
         """
+        if mode in ("exists", "topk"):
+            options = {"workers": workers != 1, "sink": sink is not None, "stats": stats is not None,
+                       "checkpoint": checkpoint is not None, "resume": resume, "progress": progress is not None}
+            unsupported = [name for name, isSet in options.items() if isSet]
+            if unsupported:
+                raise ValueError("the %s mode doesn't support %s" % (mode, ", ".join(unsupported)))
+        if mode == "exists":
+            return next(self.iterateMatches(queryGraph, inputGraph, h, 1, filterDomains), None) is not None
+        if mode == "topk":
+            if k is None:
+                raise ValueError("the topk mode needs k")
+            return list(self.iterateMatches(queryGraph, inputGraph, h, k, filterDomains))
+        if mode not in ("enumerate", "count"):
+            raise ValueError("unknown mode: %s" % mode)
+        self.stats = stats
         self.random = isRandomGraph
-        if not self.random:
-            self.output = open("static/output.txt", "w")
-        condition = self.algorithm2_modified_for_equivalance_class(queryGraph, queryGraph, h)
+        if self.random or mode == "count":
+            sink = None
+        elif sink is None:
+            sink = TextSink(self.outputFileName, self.outputShardName)
+        directed = queryGraph.getDirected() and inputGraph.getDirected()
+        condition = self.getConditions(queryGraph, h, directed)
+        plan = self.createQueryPlan(queryGraph, h, condition, directed)
+        if filterDomains:
+            self.domains = self.getPlanDomains(queryGraph, inputGraph, plan, directed)
 
         # for con in condition:
         # print(str(con) + " => " + str(condition[con][0]), end='')
@@ -426,33 +849,333 @@ class Utility:
 
         inputGraphDegSeq = inputGraph.getNodesSortedByDegree(queryGraph.getOutDegree(h))
 
-        mappingCount = 0
-        f = {}
+        state = None
+        if checkpoint is not None:
+            identity = {"query": self.conditionCache.getCanonicalForm(queryGraph, directed).key,
+                        "vertices": inputGraph.getNumberofVertices(), "edges": inputGraph.getNumberofEdges(),
+                        "edgeFingerprint": self.getEdgeFingerprint(inputGraph), "directed": directed, "mode": mode,
+                        "random": bool(isRandomGraph)}
+            state = self.loadCheckpoint(checkpoint, identity) if resume else None
+            if state is None:
+                state = {"identity": identity, "roots": None, "completed": [], "outputOffset": None,
+                         "shardOffsets": None, "finished": False}
 
-        if not isRandomGraph or len(inputGraphDegSeq) < 30:
-            for value in inputGraphDegSeq:
-                f[h] = value
-                mappingCount += self.isomorphicExtension(f, queryGraph, inputGraph, condition)
-        else:
-            newGraphDegSeq = []
+        mappingCount = 0
+        roots = inputGraphDegSeq
+        scale = None
+        if isRandomGraph and len(inputGraphDegSeq) >= 30:
             originalLength = len(inputGraphDegSeq)
             length = min(max(int(0.2 * len(inputGraphDegSeq)), 2), len(inputGraphDegSeq))
 
-            if length == len(inputGraphDegSeq):
-                newGraphDegSeq = inputGraphDegSeq
-            else:
-                for i in range(length):
-                    v = inputGraphDegSeq[randrange(len(inputGraphDegSeq) - 1)]
-                    inputGraphDegSeq.remove(v)
-                    newGraphDegSeq.append(v)
-            if newGraphDegSeq:
-                temp = 0
-                for value in newGraphDegSeq:
-                    f[h] = value
-                    temp += self.isomorphicExtension(f, queryGraph, inputGraph, condition)
-                mappingCount += int(temp * (originalLength / len(newGraphDegSeq)))
+            if state is not None and state["roots"] is not None:
+                "the sample of the run being resumed"
+                roots = state["roots"]
+            elif length != len(inputGraphDegSeq):
+                "a uniform sample without replacement of the roots (any root can be chosen)"
+                roots = (sample if rng is None else rng.sample)(inputGraphDegSeq, length)
+            scale = originalLength / len(roots)
+        if state is not None:
+            if state["roots"] is None:
+                state["roots"] = roots
+            elif state["roots"] != roots:
+                raise ValueError("checkpoint %s is for other root vertices" % checkpoint)
+        roots = self.filterRoots(roots, self.domains)
+
+        if sink is not None and workers == 1:
+            self.output = sink
+            sink.open(None if state is None else state["outputOffset"])
+        if state is not None or progress is not None:
+            temp = self.countRootsResumable(queryGraph, inputGraph, plan, roots, workers, engine, sink, checkpoint,
+                                            state, progress)
+        elif workers != 1:
+            temp = sum(self.countRootsInParallel(queryGraph, inputGraph, plan, roots, workers, engine, sink).values())
+        else:
+            temp = sum(self.countRoots(queryGraph, inputGraph, plan, roots, engine))
+        if scale is None:
+            mappingCount += temp
+        else:
+            mappingCount += int(temp * scale)
 
         if self.output is not None:
             self.output.close()
+            self.output = None
+        self.stats = None
+        self.domains = None
 
         return mappingCount
+
+    def estimateCount(self, queryGraph, inputGraph, h, sampleFraction=None, sampleSize=None, seed=None,
+                      relativeError=None, confidence=0.95, batchSize=64, workers=1, engine="iterative", stats=None):
+        """
+        Method to estimate the count of algorithm2_modified from a uniform sample (without replacement) of the roots:
+        the estimate is the number of roots times the mean count of the sampled roots, its variance is the sample
+        variance with the finite population correction, and the confidence interval is the normal one.
+        With relativeError set, roots are counted batchSize at a time until the half width of the confidence interval
+        is at most relativeError times the estimate (or sampleSize roots are counted)
+        :param queryGraph:Graph - reference to query graph
+        :param inputGraph:Graph - reference to input graph
+        :param h:int - the starting node h of query graph
+        :param sampleFraction:float - fraction of the roots to sample
+        :param sampleSize:int - number of roots to sample (the most to sample with relativeError), defaults to
+            sampleFraction of the roots, or all of them
+        :param seed: seed of the sample, None for a random one
+        :param relativeError:float - target relative half width of the confidence interval, None for a fixed sample
+        :param confidence:float - confidence level of the interval
+        :param batchSize:int - number of roots counted between two checks of relativeError
+        :param workers:int - number of worker processes, all the batches share one pool (see countRootsInParallel)
+        :param engine:str - the search engine (see countRoots)
+        :param stats:SearchStats - collects the statistics of the sampled roots (see algorithm2_modified)
+        :return: Dict[str, float] - estimate, variance, stdError, lower, upper, confidence, sampled (number of
+            roots counted) and population (number of roots)
+        """
+        self.random = True
+        self.stats = stats
+        directed = queryGraph.getDirected() and inputGraph.getDirected()
+        condition = self.getConditions(queryGraph, h, directed)
+        plan = self.createQueryPlan(queryGraph, h, condition, directed)
+        roots = inputGraph.getNodesSortedByDegree(queryGraph.getOutDegree(h))
+        population = len(roots)
+        if sampleSize is None:
+            sampleSize = population if sampleFraction is None else int(round(sampleFraction * population))
+        sampleSize = min(max(sampleSize, min(2, population)), population)
+        "a random permutation of the roots, any prefix of it is a uniform sample"
+        roots = Random(seed).sample(roots, population)
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+        counts = []
+        "one pool for all the batches"
+        executor = None if workers == 1 else self.startWorkers(queryGraph, inputGraph, plan, workers, engine)
+        try:
+            while len(counts) < sampleSize:
+                size = sampleSize - len(counts) if relativeError is None else min(batchSize, sampleSize - len(counts))
+                batch = roots[len(counts):len(counts) + size]
+                if executor is not None:
+                    rootCounts = self.countRootsInParallel(queryGraph, inputGraph, plan, batch, workers, engine,
+                                                           executor=executor)
+                    counts.extend(rootCounts[root] for root in batch)
+                else:
+                    counts.extend(self.countRoots(queryGraph, inputGraph, plan, batch, engine))
+                if relativeError is not None and len(counts) >= 2:
+                    result = self.summarizeSample(counts, population, z)
+                    if result["estimate"] > 0 and \
+                            result["upper"] - result["estimate"] <= relativeError * result["estimate"]:
+                        break
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.stats = None
+        result = self.summarizeSample(counts, population, z)
+        result["confidence"] = confidence
+        return result
+
+    @staticmethod
+    def summarizeSample(counts, population, z):
+        """
+        :param counts:List[int] - the counts of the sampled roots
+        :param population:int - number of roots
+        :param z:float - the normal quantile of the confidence level
+        :return: Dict[str, float] - estimate, variance, stdError, lower, upper and sampled (see estimateCount)
+        """
+        sampled = len(counts)
+        if sampled == 0:
+            return {"estimate": 0.0, "variance": 0.0, "stdError": 0.0, "lower": 0.0, "upper": 0.0, "sampled": 0,
+                    "population": population}
+        mean = sum(counts) / sampled
+        estimate = population * mean
+        if sampled > 1:
+            sampleVariance = sum((count - mean) ** 2 for count in counts) / (sampled - 1)
+            variance = population ** 2 * (1 - sampled / population) * sampleVariance / sampled
+        else:
+            variance = float("inf") if sampled < population else 0.0
+        stdError = variance ** 0.5
+        return {"estimate": estimate, "variance": variance, "stdError": stdError, "lower": estimate - z * stdError,
+                "upper": estimate + z * stdError, "sampled": sampled, "population": population}
+
+    def estimateRootCost(self, inputGraph, root):
+        """
+        :param inputGraph:Graph - reference to input graph
+        :param root:int - a root vertex
+        :return: int - the size of its two-hop neighborhood (sum of the degrees of its neighbors)
+        """
+        vertexList = inputGraph.getVertexList()
+        return sum(len(vertexList[neighbor]) for neighbor in vertexList[root])
+
+    def countRootsResumable(self, queryGraph, inputGraph, plan, roots, workers, engine, sink, checkpoint, state,
+                            progress):
+        """
+        Method to count the isomorphic extensions of the roots that a checkpoint doesn't hold yet, saving the
+        checkpoint every checkpointInterval seconds and reporting progress every progressInterval seconds.
+        In this process the roots are counted one at a time, with workers they are counted in checkpointBatches batches
+        by one pool, every worker appending the graphlets of its share of every batch to its own shard (the checkpoint
+        keeps the offset of every shard, see ResultSink.getOffset)
+        :param queryGraph:Graph - reference to query graph
+        :param inputGraph:Graph - reference to input graph
+        :param plan:QueryPlan - the matching plan of the query graph
+        :param roots:List[int] - the root vertices
+        :param workers:int - number of worker processes (see countRootsInParallel)
+        :param engine:str - the search engine (see countRoots)
+        :param sink:ResultSink - the sink of the graphlets (already open when workers is 1), or None
+        :param checkpoint:string - the checkpoint file, or None
+        :param state:Dict[str, object] - the content of the checkpoint (see loadCheckpoint), None without checkpoint
+        :param progress:Callable[[Dict[str, float]], None] - see algorithm2_modified, or None
+        :return: int - the count of all the roots
+        """
+        completed = {} if state is None else dict(state["completed"])
+        remaining = [root for root in roots if root not in completed]
+        costs = {root: self.estimateRootCost(inputGraph, root) for root in roots}
+        remainingCost = sum(costs[root] for root in remaining)
+        count = sum(completed.values())
+        doneRoots = doneCost = doneMatches = 0
+        start = lastCheckpoint = lastProgress = perf_counter()
+
+        def report(now):
+            elapsed = now - start
+            progress({"done": len(completed), "total": len(roots), "count": count, "elapsed": elapsed,
+                      "rootsPerSecond": doneRoots / elapsed if elapsed > 0 else 0.0,
+                      "matchesPerSecond": doneMatches / elapsed if elapsed > 0 else 0.0,
+                      "eta": elapsed * (remainingCost - doneCost) / doneCost if doneCost > 0 else None})
+
+        executor = shardOffsets = None
+        if workers == 1:
+            countRoot = self.getRootCounter(queryGraph, inputGraph, plan, engine)
+            batches = [[root] for root in remaining]
+        else:
+            if workers is None:
+                workers = os.cpu_count() or 1
+            "nothing to count when the checkpoint being resumed is finished (or there are no roots)"
+            numberOfBatches = min(self.checkpointBatches, len(remaining))
+            batches = [remaining[i::numberOfBatches] for i in range(numberOfBatches)]
+            "a resumed run truncates the shards back to the checkpoint, then appends to them"
+            shardOffsets = [None] * workers if state is None or state["shardOffsets"] is None else state["shardOffsets"]
+            if len(shardOffsets) != workers:
+                raise ValueError("checkpoint %s was written by %d workers, not %d" % (checkpoint, len(shardOffsets),
+                                                                                      workers))
+            if remaining:
+                executor = self.startWorkers(queryGraph, inputGraph, plan, workers, engine)
+
+        def save(finished):
+            if state is not None:
+                state["completed"] = list(completed.items())
+                state["outputOffset"] = self.output.getOffset() if self.output is not None else None
+                state["shardOffsets"] = shardOffsets
+                state["finished"] = finished
+                self.saveCheckpoint(checkpoint, state)
+
+        try:
+            for batch in batches:
+                if executor is None:
+                    rootCounts = {batch[0]: countRoot(batch[0])}
+                else:
+                    rootCounts = self.countRootsInParallel(queryGraph, inputGraph, plan, batch, workers, engine, sink,
+                                                           executor, shardOffsets)
+                for root in batch:
+                    completed[root] = rootCounts[root]
+                    count += rootCounts[root]
+                    doneMatches += rootCounts[root]
+                    doneCost += costs[root]
+                doneRoots += len(batch)
+                now = perf_counter()
+                if progress is not None and now - lastProgress >= self.progressInterval:
+                    report(now)
+                    lastProgress = now
+                if state is not None and now - lastCheckpoint >= self.checkpointInterval:
+                    save(False)
+                    lastCheckpoint = now
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        save(True)
+        if progress is not None:
+            report(perf_counter())
+        return count
+
+    def getEdgeFingerprint(self, inputGraph):
+        """
+        Method to identify the edge set of an input graph in a checkpoint: random graphs with the same degree sequence
+        (e.g. from RandomGraphGenerator.generateBySwitching) have the same numbers of vertices and edges
+        :param inputGraph:Graph - reference to input graph
+        :return: str - sha1 of the sorted edges (with the smaller endpoint first when undirected)
+        """
+        if inputGraph.getDirected():
+            edges = sorted((source, target) for source, target in inputGraph.getEdgeList())
+        else:
+            edges = sorted((min(source, target), max(source, target)) for source, target in inputGraph.getEdgeList())
+        return hashlib.sha1(array("q", [vertex for edge in edges for vertex in edge]).tobytes()).hexdigest()
+
+    def loadCheckpoint(self, checkpoint, identity):
+        """
+        :param checkpoint:string - the checkpoint file
+        :param identity:Dict[str, object] - the query, input graph and mode of the search
+        :return: Dict[str, object] - identity, roots, completed ([root, count] pairs), outputOffset, shardOffsets and
+            finished, None if the file doesn't exist
+        """
+        if not os.path.exists(checkpoint):
+            return None
+        with open(checkpoint) as checkpointFile:
+            state = json.load(checkpointFile)
+        if state["identity"] != identity:
+            raise ValueError("checkpoint %s is for another search" % checkpoint)
+        return state
+
+    def saveCheckpoint(self, checkpoint, state):
+        """
+        :param checkpoint:string - the checkpoint file, replaced atomically
+        :param state:Dict[str, object] - see loadCheckpoint
+        """
+        temporaryName = "%s.%d.tmp" % (checkpoint, os.getpid())
+        with open(temporaryName, "w") as checkpointFile:
+            json.dump(state, checkpointFile)
+        os.replace(temporaryName, checkpoint)
+
+    def startWorkers(self, queryGraph, inputGraph, plan, workers, engine="recursive"):
+        """
+        Method to start the process pool of countRootsInParallel: every worker receives the graphs, the plan and the
+        settings of this search (self.random, self.stats, self.domains) once, in its initializer
+        :param queryGraph:Graph - reference to query graph
+        :param inputGraph:Graph - reference to input graph
+        :param plan:QueryPlan - the matching plan of the query graph
+        :param workers:int - number of worker processes, None for one per CPU
+        :param engine:str - the search engine (see countRoots)
+        :return: ProcessPoolExecutor - the pool, to shut down once the search is over
+        """
+        return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=_initWorker,
+                                   initargs=(queryGraph, inputGraph, plan, self.random, engine,
+                                             self.stats is not None, self.domains))
+
+    def countRootsInParallel(self, queryGraph, inputGraph, plan, roots, workers, engine="recursive", sink=None,
+                             executor=None, shardOffsets=None):
+        """
+        Method to count the isomorphic extensions of many roots with a process pool
+        :param queryGraph:Graph - reference to query graph
+        :param inputGraph:Graph - reference to input graph
+        :param plan:QueryPlan - the matching plan of the query graph
+        :param roots:List[int] - the vertices of the input graph h is mapped to
+        :param workers:int - number of worker processes, None for one per CPU
+        :param engine:str - the search engine (see countRoots)
+        :param sink:ResultSink - the graphlets of worker i go to sink.forShard(i), then are merged into sink
+        :param executor:ProcessPoolExecutor - a pool of startWorkers for the same search, None to start one for
+            these roots only
+        :param shardOffsets:List[object] - the offset to open every shard at (None to start it anew), updated with
+            the offsets after these roots so that the next call appends to the shards; None starts every shard anew
+        :return: Dict[int, int] - the count of every root
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if executor is None:
+            with self.startWorkers(queryGraph, inputGraph, plan, workers, engine) as executor:
+                return self.countRootsInParallel(queryGraph, inputGraph, plan, roots, workers, engine, sink, executor,
+                                                 shardOffsets)
+        parts = self.partitionRoots(inputGraph, roots, workers)
+        tasks = [(part, None if sink is None else sink.forShard(index),
+                  None if shardOffsets is None else shardOffsets[index])
+                 for index, part in enumerate(parts)]
+        rootCounts = {}
+        for index, (part, (counts, result, offset, stats)) in enumerate(zip(parts, executor.map(_countRoots, tasks))):
+            rootCounts.update(zip(part, counts))
+            if shardOffsets is not None:
+                shardOffsets[index] = offset
+            if sink is not None:
+                sink.merge(result)
+            if stats is not None:
+                self.stats.merge(stats)
+        return rootCounts
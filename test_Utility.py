@@ -0,0 +1,262 @@
+from CompactGraph import CompactGraph
+from Graph import Graph
+from GraphProcessor import GraphProcessor
+from IncrementalCounter import IncrementalCounter
+from ResultSink import TextSink
+from Utility import Utility
+from itertools import combinations, permutations
+from random import Random
+from tempfile import TemporaryDirectory
+import glob
+import os
+import unittest
+
+QUERIES = {"triangle": [[0, 1], [1, 2], [2, 0]],
+           "path3": [[0, 1], [1, 2]],
+           "star4": [[0, 1], [0, 2], [0, 3]],
+           "square": [[0, 1], [1, 2], [2, 3], [3, 0]],
+           "paw": [[0, 1], [1, 2], [2, 0], [2, 3]],
+           "diamond": [[0, 1], [1, 2], [2, 3], [3, 0], [0, 2]],
+           "k4": [[0, 1], [0, 2], [0, 3], [1, 2], [1, 3], [2, 3]],
+           "path4": [[0, 1], [1, 2], [2, 3]]}
+
+
+def getRandomEdges(numberOfVertices, probability, seed, directed):
+    """
+    :return: List[List[int]] - the edges of a small random graph, every pair (ordered when directed) drawn once
+    """
+    random = Random(seed)
+    return [[u, v] for u in range(numberOfVertices) for v in range(numberOfVertices)
+            if (u != v if directed else u < v) and random.random() < probability]
+
+
+def countBruteForce(queryGraph, inputGraph, directed):
+    """
+    :return: int - the number of vertex sets of the input graph whose induced subgraph is isomorphic to the query
+    """
+    queryVertices = sorted(queryGraph.getVertexList())
+    queryArcs = {(a, b) for a, b in queryGraph.getEdgeList()}
+    inputArcs = {(a, b) for a, b in inputGraph.getEdgeList()}
+    if not directed:
+        queryArcs |= {(b, a) for a, b in queryArcs}
+        inputArcs |= {(b, a) for a, b in inputArcs}
+    count = 0
+    for vertices in combinations(sorted(inputGraph.getVertexList()), len(queryVertices)):
+        induced = {(a, b) for a in vertices for b in vertices if (a, b) in inputArcs}
+        for images in permutations(vertices):
+            image = dict(zip(queryVertices, images))
+            if {(image[a], image[b]) for a, b in queryArcs} == induced:
+                count += 1
+                break
+    return count
+
+
+class TestParallelOutput(unittest.TestCase):
+    """
+    The graphlets written by the worker shards of a parallel search must be the ones it counts
+    """
+
+    def setUp(self):
+        directory = os.path.dirname(os.path.abspath(__file__))
+        self.inputGraph = GraphProcessor().loadGraph(os.path.join(directory, "inputGraph.txt"), False, cache=False)
+        self.queryGraph = Graph([[0, 1], [1, 2], [2, 0]])
+        self.temporaryDirectory = TemporaryDirectory()
+        self.addCleanup(self.temporaryDirectory.cleanup)
+
+    def countShardLines(self):
+        lines = 0
+        shards = glob.glob(os.path.join(self.temporaryDirectory.name, "output_*.txt"))
+        self.assertLessEqual(len(shards), 2, "one shard per worker")
+        for fileName in shards:
+            with open(fileName) as shardFile:
+                lines += sum(1 for _ in shardFile)
+        return lines
+
+    def runSearch(self, **options):
+        sink = TextSink(os.path.join(self.temporaryDirectory.name, "output.txt"))
+        return Utility().algorithm2_modified(self.queryGraph, self.inputGraph, 0, 0, workers=2, sink=sink, **options)
+
+    def testShards(self):
+        count = self.runSearch()
+        self.assertEqual(count, 283)
+        self.assertEqual(self.countShardLines(), count)
+
+    def testShardsWithProgress(self):
+        count = self.runSearch(progress=lambda report: None)
+        self.assertEqual(count, 283)
+        self.assertEqual(self.countShardLines(), count)
+
+    def testShardsWithCheckpoint(self):
+        checkpoint = os.path.join(self.temporaryDirectory.name, "checkpoint.json")
+        count = self.runSearch(checkpoint=checkpoint)
+        self.assertEqual(count, 283)
+        self.assertEqual(self.countShardLines(), count)
+
+    def testShardsAfterResume(self):
+        checkpoint = os.path.join(self.temporaryDirectory.name, "checkpoint.json")
+        reports = []
+
+        def interrupt(report):
+            reports.append(report)
+            if len(reports) == 3:
+                raise KeyboardInterrupt
+
+        savedIntervals = Utility.checkpointInterval, Utility.progressInterval
+        Utility.checkpointInterval = Utility.progressInterval = 0.0
+        try:
+            with self.assertRaises(KeyboardInterrupt):
+                self.runSearch(checkpoint=checkpoint, progress=interrupt)
+            count = self.runSearch(checkpoint=checkpoint, resume=True)
+        finally:
+            Utility.checkpointInterval, Utility.progressInterval = savedIntervals
+        self.assertEqual(count, 283)
+        self.assertEqual(self.countShardLines(), count)
+
+    def testResumeFinished(self):
+        checkpoint = os.path.join(self.temporaryDirectory.name, "checkpoint.json")
+        self.runSearch(checkpoint=checkpoint)
+        count = self.runSearch(checkpoint=checkpoint, resume=True)
+        self.assertEqual(count, 283)
+        self.assertEqual(self.countShardLines(), count)
+
+
+class TestSearchEngines(unittest.TestCase):
+    """
+    The iterative engine must count what the recursive one and a brute force count
+    """
+
+    def setUp(self):
+        self.inputGraphs = [Graph(getRandomEdges(10, 0.4, seed, False)) for seed in range(2)]
+
+    def testIterativeEngine(self):
+        for name, edges in QUERIES.items():
+            queryGraph = Graph(edges)
+            for inputGraph in self.inputGraphs:
+                expected = countBruteForce(queryGraph, inputGraph, False)
+                for engine in ("recursive", "iterative"):
+                    count = Utility().algorithm2_modified(queryGraph, inputGraph, 0, 0, engine=engine, mode="count")
+                    self.assertEqual(count, expected, "%s with the %s engine" % (name, engine))
+
+    def testEveryStartVertex(self):
+        "the symmetry-breaking conditions must count every occurrence once whichever query vertex is matched first"
+        inputGraph = self.inputGraphs[1]
+        for name, edges in QUERIES.items():
+            queryGraph = Graph(edges)
+            expected = countBruteForce(queryGraph, inputGraph, False)
+            for h in queryGraph.getVertexList():
+                count = Utility().algorithm2_modified(queryGraph, inputGraph, h, 0, engine="iterative", mode="count")
+                self.assertEqual(count, expected, "%s from query vertex %d" % (name, h))
+
+
+    def testEarlyStopModes(self):
+        queryGraph = Graph(QUERIES["triangle"])
+        inputGraph = self.inputGraphs[1]
+        self.assertTrue(Utility().algorithm2_modified(queryGraph, inputGraph, 0, 0, mode="exists"))
+        self.assertEqual(len(Utility().algorithm2_modified(queryGraph, inputGraph, 0, 0, mode="topk", k=3)), 3)
+        for options in ({"workers": 2}, {"workers": None}, {"progress": print}, {"checkpoint": "checkpoint.json"}):
+            with self.assertRaises(ValueError):
+                Utility().algorithm2_modified(queryGraph, inputGraph, 0, 0, mode="exists", **options)
+
+
+class TestDirectedSearch(unittest.TestCase):
+    """
+    Directed searches must match the direction of every edge, not only of the edges they walk
+    """
+
+    def testDiamond(self):
+        directory = os.path.dirname(os.path.abspath(__file__))
+        inputGraph = GraphProcessor().loadGraph(os.path.join(directory, "inputGraph.txt"), True, cache=False)
+        queryGraph = Graph(QUERIES["diamond"], None, True)
+        for engine in ("recursive", "iterative"):
+            count = Utility().algorithm2_modified(queryGraph, inputGraph, 0, 0, engine=engine, mode="count")
+            self.assertEqual(count, 60, "directed diamond with the %s engine" % engine)
+
+    def testBruteForce(self):
+        inputGraph = Graph(getRandomEdges(11, 0.35, 0, True), None, True)
+        for name, edges in QUERIES.items():
+            "the edges as listed, then turned around in turn with the last one going both ways"
+            turned = [edge if i % 2 else edge[::-1] for i, edge in enumerate(edges)] + [edges[-1][::-1]]
+            for queryEdges in (edges, turned):
+                queryGraph = Graph(queryEdges, None, True)
+                expected = countBruteForce(queryGraph, inputGraph, True)
+                for engine in ("recursive", "iterative"):
+                    count = Utility().algorithm2_modified(queryGraph, inputGraph, 0, 0, engine=engine, mode="count")
+                    self.assertEqual(count, expected, "directed %s %s with the %s engine" % (name, queryEdges, engine))
+
+
+class TestCandidateDomains(unittest.TestCase):
+    """
+    Pruning with the candidate domains must not lose an occurrence
+    """
+
+    def testUndirected(self):
+        for seed in range(2):
+            inputGraph = Graph(getRandomEdges(10, 0.4, seed, False))
+            for name, edges in QUERIES.items():
+                queryGraph = Graph(edges)
+                expected = countBruteForce(queryGraph, inputGraph, False)
+                for engine in ("recursive", "iterative"):
+                    count = Utility().algorithm2_modified(queryGraph, inputGraph, 0, 0, engine=engine, mode="count",
+                                                          filterDomains=True)
+                    self.assertEqual(count, expected, "%s with the %s engine" % (name, engine))
+
+    def testDirected(self):
+        inputGraph = Graph(getRandomEdges(11, 0.35, 0, True), None, True)
+        for name, edges in QUERIES.items():
+            queryGraph = Graph(edges, None, True)
+            expected = countBruteForce(queryGraph, inputGraph, True)
+            for engine in ("recursive", "iterative"):
+                count = Utility().algorithm2_modified(queryGraph, inputGraph, 0, 0, engine=engine, mode="count",
+                                                      filterDomains=True)
+                self.assertEqual(count, expected, "directed %s with the %s engine" % (name, engine))
+
+
+class TestIncrementalCounter(unittest.TestCase):
+    """
+    The count kept up to date edge by edge must be the count of the graph after every change
+    """
+
+    def checkUpdates(self, probability, directed):
+        random = Random(1)
+        for name in ("triangle", "path3", "square", "diamond"):
+            inputGraph = Graph(getRandomEdges(9, probability, 2, directed), None, directed)
+            queryGraph = Graph(QUERIES[name], None, directed)
+            counter = IncrementalCounter(queryGraph, inputGraph)
+            self.assertEqual(counter.count, countBruteForce(queryGraph, inputGraph, directed), name)
+            for _ in range(12):
+                u, v = random.sample(range(9), 2)
+                if inputGraph.hasArc(u, v):
+                    self.assertTrue(counter.removeEdge([u, v]))
+                else:
+                    self.assertTrue(counter.addEdge([u, v]))
+                self.assertEqual(counter.count, countBruteForce(queryGraph, inputGraph, directed),
+                                 "%s after changing %d, %d" % (name, u, v))
+
+    def testUndirected(self):
+        self.checkUpdates(0.35, False)
+
+    def testDirected(self):
+        self.checkUpdates(0.5, True)
+
+
+class TestCompactLoad(unittest.TestCase):
+    """
+    A graph loaded compact must be the CSR copy of the Graph loaded from the same file
+    """
+
+    def testRepeatedEdges(self):
+        with TemporaryDirectory() as directory:
+            fileName = os.path.join(directory, "edges.txt")
+            with open(fileName, "w") as edgeFile:
+                edgeFile.write("a b\nb a\na b\nc c\nb c\nd a\n")
+            for directed in (False, True):
+                graph = GraphProcessor().loadGraph(fileName, directed, cache=False)
+                expected = CompactGraph.fromGraph(graph)
+                for cache in (False, True, True):
+                    compactGraph = GraphProcessor().loadGraph(fileName, directed, compact=True, cache=cache)
+                    for name in CompactGraph.fileSections[:-2]:
+                        self.assertEqual(getattr(compactGraph, name), getattr(expected, name), name)
+
+
+if __name__ == "__main__":
+    unittest.main()